@@ -1,11 +1,26 @@
 from PIL import Image
 from tkinter import Tk, filedialog, messagebox
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import argparse
+import glob
 import os
 import struct
+import sys
 
-# Fixed size
-FIXED_WIDTH = 640
-FIXED_HEIGHT = 472
+# Default output size (the stock collision grid); any size up to the uint16 header limit works
+DEFAULT_WIDTH = 640
+DEFAULT_HEIGHT = 472
+MAX_DIMENSION = 0xFFFF
+
+# DAT value → RGB for reconstruction: 0x00 sea (blue), 0x01 land (black), anything else unknown (magenta)
+DAT_PALETTE = [0, 0, 255] + [0, 0, 0] + [255, 0, 255] * 254
+
+class NotNavMatrix(ValueError):
+    """The .dat file is not a nav_matrix.dat (its header does not match its size)."""
+
+class OutputCollision(ValueError):
+    """Several batch inputs would be written to the same output file."""
 
 def classify_pixel(r, g, b):
     """Classify pixel as 0x00 (sea/blue) or 0x01 (land/black)."""
@@ -16,68 +31,191 @@ def classify_pixel(r, g, b):
     else:
         return 0x01  # everything else treated as land
 
-def bmp_to_dat(bmp_path):
-    """Convert BMP → nav_matrix.dat using fixed 640x472 size."""
+def classify_pixels(rgb):
+    """Vectorized classify_pixel over an (H, W, 3) uint8 array → (H, W) uint8."""
+    r = rgb[..., 0]
+    g = rgb[..., 1]
+    b = rgb[..., 2]
+    sea = (b > r) & (b > g) & (b > 100)
+    # Same rule as classify_pixel: only clearly blue pixels are sea, the rest is land
+    return np.where(sea, np.uint8(0x00), np.uint8(0x01))
+
+def parse_size(text):
+    """Parse "WxH" into (W, H), or "native" into None (keep the source resolution)."""
+    if text.lower() == "native":
+        return None
+    try:
+        width, height = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WxH or 'native', got {text!r}")
+    if not (0 < width <= MAX_DIMENSION and 0 < height <= MAX_DIMENSION):
+        raise argparse.ArgumentTypeError(f"size must be between 1 and {MAX_DIMENSION} per side")
+    return width, height
+
+def parse_jobs(text):
+    """Parse a worker process count (at least 1)."""
+    try:
+        jobs = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number of processes, got {text!r}")
+    if jobs < 1:
+        raise argparse.ArgumentTypeError("at least 1 worker process is needed")
+    return jobs
+
+def bmp_to_dat(bmp_path, dat_path=None, size=(DEFAULT_WIDTH, DEFAULT_HEIGHT)):
+    """Convert BMP → nav_matrix.dat at the given (width, height), or the source size when None. Returns the output path."""
     img = Image.open(bmp_path).convert("RGB")
-    img = img.resize((FIXED_WIDTH, FIXED_HEIGHT))  # force fixed resolution
-    pixels = list(img.getdata())
+    if size is not None and img.size != tuple(size):
+        img = img.resize(size)
+    width, height = img.size
+    if width > MAX_DIMENSION or height > MAX_DIMENSION:
+        raise ValueError(f"{width}x{height} does not fit the uint16 nav_matrix.dat header")
 
-    # Create binary data with header (width + height)
-    binary_data = bytearray()
-    binary_data += struct.pack("<HH", FIXED_WIDTH, FIXED_HEIGHT)  # 2 bytes each
+    # Classify the whole RGB buffer in one pass
+    cells = classify_pixels(np.asarray(img, dtype=np.uint8))
 
-    for r, g, b in pixels:
-        binary_data.append(classify_pixel(r, g, b))
-
-    # Always save as nav_matrix.dat in the same directory as the input file
-    output_dir = os.path.dirname(bmp_path)
-    dat_path = os.path.join(output_dir, "nav_matrix.dat")
+    # By default save as nav_matrix.dat in the same directory as the input file
+    if dat_path is None:
+        output_dir = os.path.dirname(bmp_path)
+        dat_path = os.path.join(output_dir, "nav_matrix.dat")
 
+    # Header (width + height, 2 bytes each) followed by the row-major payload
     with open(dat_path, "wb") as f:
-        f.write(binary_data)
+        f.write(struct.pack("<HH", width, height))
+        f.write(np.ascontiguousarray(cells).data)
 
     print(f"✅ Conversion complete: {dat_path}")
-    messagebox.showinfo("Done", f"File saved as:\n{dat_path}")
+    return dat_path
+
+def dat_to_bmp(dat_path, bmp_path=None):
+    """Convert DAT → BMP at the size given in its header. Returns the output path.
 
-def dat_to_bmp(dat_path):
-    """Convert DAT → BMP (auto reads header but enforces 640x472 display)."""
+    Raises NotNavMatrix when the file is not a nav_matrix.dat (e.g. nav_vec.dat or matrix_int.dat).
+    """
     with open(dat_path, "rb") as f:
         data = f.read()
 
     if len(data) < 4:
-        print("❌ Invalid DAT file: too small to contain header.")
-        return
+        raise NotNavMatrix(f"{len(data)} bytes, too small to contain the nav_matrix.dat header")
 
-    # Read width & height (but we can also enforce our fixed size)
     width, height = struct.unpack("<HH", data[:4])
     print(f"Detected size in header: {width}x{height}")
 
     pixel_data = data[4:]
-    expected_size = FIXED_WIDTH * FIXED_HEIGHT
+    expected_size = width * height
 
     if len(pixel_data) != expected_size:
-        print(f"⚠️ Warning: pixel data size ({len(pixel_data)}) does not match expected {FIXED_WIDTH}x{FIXED_HEIGHT}")
-        return
-
-    img = Image.new("RGB", (FIXED_WIDTH, FIXED_HEIGHT))
-    pixels = img.load()
-
-    for i, value in enumerate(pixel_data):
-        x = i % FIXED_WIDTH
-        y = i // FIXED_WIDTH
-        if value == 0x00:
-            pixels[x, y] = (0, 0, 255)   # sea (blue)
-        elif value == 0x01:
-            pixels[x, y] = (0, 0, 0)     # land (black)
-        else:
-            pixels[x, y] = (255, 0, 255) # unknown (magenta)
+        raise NotNavMatrix(f"pixel data size ({len(pixel_data)}) does not match the {width}x{height} header")
 
-    bmp_path = os.path.splitext(dat_path)[0] + "_reconstructed.bmp"
+    # Use the payload directly as palette indices and expand it in one lookup
+    img = Image.frombuffer("P", (width, height), pixel_data, "raw", "P", 0, 1)
+    img.putpalette(DAT_PALETTE)
+    img = img.convert("RGB")
+
+    if bmp_path is None:
+        bmp_path = os.path.splitext(dat_path)[0] + "_reconstructed.bmp"
     img.save(bmp_path)
     print(f"✅ Image reconstructed: {bmp_path}")
-    messagebox.showinfo("Done", f"Image saved as:\n{bmp_path}")
+    return bmp_path
+
+# === Headless batch mode ===
+def collect_inputs(patterns, extension):
+    """Expand files, directories and glob patterns into a sorted list of files with the given extension."""
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = glob.glob(os.path.join(pattern, "*"))
+        else:
+            candidates = glob.glob(pattern) or [pattern]
+        for path in candidates:
+            if os.path.isfile(path) and path.lower().endswith(extension):
+                found.add(os.path.abspath(path))
+    return sorted(found)
+
+def batch_output_path(src_path, output_dir, reverse):
+    """Output path for one batch job: next to the source unless an output directory is given."""
+    stem = os.path.splitext(os.path.basename(src_path))[0]
+    name = f"{stem}_reconstructed.bmp" if reverse else f"{stem}_nav_matrix.dat"
+    return os.path.join(output_dir or os.path.dirname(src_path), name)
+
+def convert_one(job):
+    """Process pool worker: convert a single file, returning (source, output, error, skip reason), None where unused."""
+    src_path, dst_path, reverse, size = job
+    try:
+        if reverse:
+            result = dat_to_bmp(src_path, dst_path)
+        else:
+            result = bmp_to_dat(src_path, dst_path, size)
+    except NotNavMatrix as e:
+        return src_path, None, None, str(e)
+    except Exception as e:
+        return src_path, None, str(e), None
+    return src_path, result, None, None
+
+def run_batch(patterns, output_dir=None, reverse=False, jobs=None, size=(DEFAULT_WIDTH, DEFAULT_HEIGHT)):
+    """Convert every matching file, in parallel when more than one job is allowed.
+
+    Returns the failures, or None when no input matched. Raises OutputCollision (before anything
+    is written) when two inputs map to the same output, e.g. a.bmp from two folders with -o.
+    """
+    inputs = collect_inputs(patterns, ".dat" if reverse else ".bmp")
+    if not inputs:
+        print("No input files found.")
+        return None
+
+    work = [(path, batch_output_path(path, output_dir, reverse), reverse, size) for path in inputs]
+    sources = {}
+    for src, dst, _, _ in work:
+        sources.setdefault(dst, []).append(src)
+    clashes = [f"{', '.join(srcs)} → {dst}" for dst, srcs in sources.items() if len(srcs) > 1]
+    if clashes:
+        raise OutputCollision("several inputs would be written to the same output file: " + "; ".join(clashes))
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(work) == 1:
+        results = [convert_one(job) for job in work]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(work))) as pool:
+            results = list(pool.map(convert_one, work))
+
+    # Other .dat files of a navdata folder (nav_vec.dat, matrix_int.dat) are skipped, not failures
+    skipped = [(src, reason) for src, _, _, reason in results if reason is not None]
+    failures = [(src, error) for src, _, error, _ in results if error is not None]
+    for src, reason in skipped:
+        print(f"⏭️ {src}: skipped, not a nav_matrix.dat ({reason})")
+    for src, error in failures:
+        print(f"❌ {src}: {error}")
+    converted = len(results) - len(failures) - len(skipped)
+    print(f"Converted {converted}/{len(results) - len(skipped)} files" + (f", {len(skipped)} skipped" if skipped else ""))
+    return failures
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Convert collision maps between BMP and nav_matrix.dat. Without inputs the GUI is started."
+    )
+    parser.add_argument("inputs", nargs="*", help="BMP/DAT files, directories or glob patterns")
+    parser.add_argument("-o", "--output-dir", help="write outputs here instead of next to each source")
+    parser.add_argument("-r", "--reverse", action="store_true", help="convert DAT → BMP instead of BMP → DAT")
+    parser.add_argument("-j", "--jobs", type=parse_jobs, default=None, help="number of worker processes (default: CPU count)")
+    parser.add_argument("-s", "--size", type=parse_size, default=(DEFAULT_WIDTH, DEFAULT_HEIGHT),
+                        help=f"nav_matrix.dat size as WxH, or 'native' to keep the BMP size (default: {DEFAULT_WIDTH}x{DEFAULT_HEIGHT})")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    if args.inputs:
+        try:
+            failures = run_batch(args.inputs, args.output_dir, args.reverse, args.jobs, args.size)
+        except OutputCollision as e:
+            parser.error(str(e))
+        if failures is None:
+            return 1  # nothing matched: most likely a mistyped path or pattern
+        return 1 if failures else 0
 
-def main():
     root = Tk()
     root.withdraw()
 
@@ -92,7 +230,8 @@ def main():
             filetypes=[("Bitmap files", "*.bmp")]
         )
         if bmp_path:
-            bmp_to_dat(bmp_path)
+            dat_path = bmp_to_dat(bmp_path)
+            messagebox.showinfo("Done", f"File saved as:\n{dat_path}")
         else:
             print("No file selected.")
     else:
@@ -101,9 +240,16 @@ def main():
             filetypes=[("DAT files", "*.dat")]
         )
         if dat_path:
-            dat_to_bmp(dat_path)
+            try:
+                bmp_path = dat_to_bmp(dat_path)
+            except NotNavMatrix as e:
+                print(f"❌ Invalid DAT file: {e}")
+                messagebox.showerror("Invalid DAT file", str(e))
+            else:
+                messagebox.showinfo("Done", f"Image saved as:\n{bmp_path}")
         else:
             print("No file selected.")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,154 @@
+from PIL import Image
+import numpy as np
+import argparse
+import json
+import os
+import struct
+import sys
+
+from ImgConv import classify_pixels
+
+# Frame around the playable area of the main map (excluded from the collision map)
+BORDER = 64
+TILE_SIZE = 16      # collision cells per heatmap tile side
+MAX_SHIFT = 4       # offsets searched in each direction, in collision cells
+DEFAULT_THRESHOLD = 0.95
+
+# === Loading ===
+def load_collision(path):
+    """Collision cells (H, W) uint8, 0 sea / 1 land, from a nav_matrix.dat or a collision BMP."""
+    if path.lower().endswith(".dat"):
+        with open(path, "rb") as f:
+            data = f.read()
+        width, height = struct.unpack_from("<HH", data)
+        cells = np.frombuffer(data, dtype=np.uint8, offset=4)
+        if cells.size != width * height:
+            raise ValueError(f"{path}: {cells.size} cells for a {width}x{height} header")
+        return cells.reshape(height, width)
+    img = Image.open(path).convert("RGB")
+    return classify_pixels(np.asarray(img, dtype=np.uint8))
+
+def main_map_cells(path, size, border=BORDER):
+    """Usable area of the main map (border cropped), area-averaged down to size and classified like ImgConv."""
+    img = Image.open(path).convert("RGB")
+    usable = img.crop((border, border, img.width - border, img.height - border))
+    usable = usable.resize(size, Image.Resampling.BOX)
+    return classify_pixels(np.asarray(usable, dtype=np.uint8))
+
+# === Scoring ===
+def tile_heatmap(mismatch, tile=TILE_SIZE):
+    """Fraction of mismatching cells per tile×tile block (partial edge tiles use their real cell count)."""
+    height, width = mismatch.shape
+    rows = -(-height // tile)
+    cols = -(-width // tile)
+    padded = np.zeros((rows * tile, cols * tile), dtype=np.float64)
+    counts = np.zeros_like(padded)
+    padded[:height, :width] = mismatch
+    counts[:height, :width] = 1
+    sums = padded.reshape(rows, tile, cols, tile).sum(axis=(1, 3))
+    cells = counts.reshape(rows, tile, cols, tile).sum(axis=(1, 3))
+    return sums / cells
+
+def shifted_overlap(reference, cells, dx, dy):
+    """Overlapping views where cells[y, x] is compared with reference[y + dy, x + dx]."""
+    height, width = cells.shape
+    ys = slice(max(0, -dy), min(height, height - dy))
+    xs = slice(max(0, -dx), min(width, width - dx))
+    ref = reference[ys.start + dy:ys.stop + dy, xs.start + dx:xs.stop + dx]
+    return ref, cells[ys, xs]
+
+def best_offset(reference, cells, max_shift=MAX_SHIFT):
+    """(dx, dy, mismatch fraction) of the shift within ±max_shift that agrees best; ties prefer small shifts."""
+    best = None
+    for dy in range(-max_shift, max_shift + 1):
+        for dx in range(-max_shift, max_shift + 1):
+            ref, col = shifted_overlap(reference, cells, dx, dy)
+            if not col.size:
+                continue
+            key = (np.count_nonzero(ref != col) / col.size, abs(dx) + abs(dy), dy, dx)
+            if best is None or key < best:
+                best = key
+    fraction, _, dy, dx = best
+    return dx, dy, fraction
+
+def score_alignment(main_path, collision_path, border=BORDER, tile=TILE_SIZE, max_shift=MAX_SHIFT):
+    """Compare a main map with its collision map. Returns (report dict, per-tile mismatch heatmap)."""
+    collision = load_collision(collision_path)
+    height, width = collision.shape
+    reference = main_map_cells(main_path, (width, height), border)
+
+    mismatch = reference != collision
+    heatmap = tile_heatmap(mismatch, tile)
+    dx, dy, shifted_fraction = best_offset(reference, collision, max_shift)
+    worst = np.unravel_index(np.argmax(heatmap), heatmap.shape)
+
+    report = {
+        "main_map": main_path,
+        "collision_map": collision_path,
+        "size": [width, height],
+        "score": 1.0 - float(mismatch.mean()),
+        "mismatch_cells": int(mismatch.sum()),
+        "land_as_sea": int((collision == 0x00)[mismatch].sum()),  # main map shows land, collision says sea
+        "sea_as_land": int((collision == 0x01)[mismatch].sum()),
+        "worst_tile": {"x": int(worst[1] * tile), "y": int(worst[0] * tile), "mismatch": float(heatmap[worst])},
+        "best_offset": {"dx": dx, "dy": dy, "score": 1.0 - shifted_fraction},
+    }
+    return report, heatmap
+
+def save_heatmap(heatmap, path, tile=TILE_SIZE):
+    """Heatmap as an image: black = aligned, red = every cell in the tile disagrees."""
+    red = np.rint(heatmap * 255).astype(np.uint8)
+    rgb = np.zeros(heatmap.shape + (3,), dtype=np.uint8)
+    rgb[..., 0] = red
+    img = Image.fromarray(rgb, "RGB")
+    img.resize((heatmap.shape[1] * tile, heatmap.shape[0] * tile), Image.Resampling.NEAREST).save(path)
+
+# === CLI ===
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Score how well main maps (with border) line up with their collision maps (BMP or nav_matrix.dat)"
+    )
+    parser.add_argument("maps", nargs="+", metavar="MAIN COLLISION", help="pairs of main map and collision map")
+    parser.add_argument("--border", type=int, default=BORDER, help="main map frame width in pixels")
+    parser.add_argument("--tile", type=int, default=TILE_SIZE, help="heatmap tile size in collision cells")
+    parser.add_argument("--max-shift", type=int, default=MAX_SHIFT, help="offset search radius in collision cells")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="minimum score to pass (exit code 1 otherwise)")
+    parser.add_argument("--heatmap-dir", help="write <collision>_heatmap.png files here")
+    parser.add_argument("--json", help="write all reports to this JSON file")
+    args = parser.parse_args(argv)
+    if len(args.maps) % 2:
+        parser.error("maps must come in MAIN COLLISION pairs")
+    return args
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    reports = []
+    for main_path, collision_path in zip(args.maps[::2], args.maps[1::2]):
+        report, heatmap = score_alignment(main_path, collision_path, args.border, args.tile, args.max_shift)
+        report["passed"] = report["score"] >= args.threshold
+        reports.append(report)
+
+        offset = report["best_offset"]
+        worst = report["worst_tile"]
+        mark = "✅" if report["passed"] else "❌"
+        print(f"{mark} {collision_path}: score {report['score']:.2%} "
+              f"({report['land_as_sea']} land as sea, {report['sea_as_land']} sea as land)")
+        print(f"   worst tile at ({worst['x']}, {worst['y']}): {worst['mismatch']:.0%} mismatch")
+        if (offset["dx"], offset["dy"]) != (0, 0):
+            print(f"   ⚠️ best alignment at offset ({offset['dx']}, {offset['dy']}): score {offset['score']:.2%}")
+
+        if args.heatmap_dir:
+            os.makedirs(args.heatmap_dir, exist_ok=True)
+            stem = os.path.splitext(os.path.basename(collision_path))[0]
+            save_heatmap(heatmap, os.path.join(args.heatmap_dir, f"{stem}_heatmap.png"), args.tile)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+    failed = sum(not r["passed"] for r in reports)
+    print(f"{len(reports) - failed}/{len(reports)} map pairs aligned")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
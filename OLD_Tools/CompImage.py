@@ -2,6 +2,11 @@ import tkinter as tk
 from tkinter import ttk, filedialog
 from PIL import Image, ImageTk
 
+from tile_pyramid import BlendedPyramid, TilePyramid, TiledView
+
+# Slider ticks arriving within this window are coalesced: only the latest value is rendered
+RENDER_DELAY_MS = 15
+
 class MapOverlayApp:
     def __init__(self, root, bg_border=64):
         self.root = root
@@ -35,7 +40,7 @@ class MapOverlayApp:
         # Ridimensiona l'overlay per adattarlo all'area utile
         self.overlay = self.overlay.resize((bg_usable_width, bg_usable_height), Image.NEAREST)
 
-        # Ridimensiona lo sfondo per adattarlo alla finestra (mantenendo aspect ratio)
+        # Fattore di scala della vista intera (mantenendo aspect ratio)
         bg_ratio = min(
             self.screen_width / self.background.width,
             self.screen_height / self.background.height
@@ -59,12 +64,37 @@ class MapOverlayApp:
             int(bg_border * overlay_ratio)
         )
 
-        # Crea la Label per l'immagine
-        self.image_label = tk.Label(root)
-        self.image_label.pack()
+        # Layer pronti per il blend della vista intera, calcolati una sola volta: overlay RGB e la zona di sfondo che copre
+        self.background_display = self.background_display.convert("RGB")
+        self.overlay_display = self.overlay_display.convert("RGB")
+        x, y = self.overlay_pos
+        self.overlay_box = (x, y, x + self.overlay_display.width, y + self.overlay_display.height)
+        self.background_region = self.background_display.crop(self.overlay_box)
+
+        # Layer a piena risoluzione: lo sfondo e lo sfondo con l'overlay incollato nell'area utile
+        self.background = self.background.convert("RGB")
+        self.overlay_full = self.background.copy()
+        self.overlay_full.paste(self.overlay.convert("RGB"), (bg_border, bg_border))
+
+        # Piramidi di tile: il blend avviene tile per tile, solo per quelle visibili
+        self.blended = BlendedPyramid(TilePyramid(self.background), TilePyramid(self.overlay_full))
+        self.canvas = tk.Canvas(root, width=self.bg_display_width, height=self.bg_display_height,
+                                highlightthickness=0)
+        self.canvas.pack()
+        self.view = TiledView(self.canvas, {"blend": self.blended}, (bg_ratio, bg_ratio),
+                              (self.bg_display_width, self.bg_display_height), on_change=self.on_view_change)
+        self.view.bind()
+
+        # Vista intera (zoom 1): composito e PhotoImage unici, riutilizzati ad ogni aggiornamento
+        # (solo la zona dell'overlay cambia). Le tile servono solo quando si ingrandisce.
+        self.composite = self.background_display.copy()
+        self.composite_alpha = None
+        self.tk_image = ImageTk.PhotoImage(self.composite)
+        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.tk_image, tags="full")
+        self.pending_opacity = None
+        self.render_job = None
 
         # Imposta opacità iniziale al 50%
-        self.composite = self.background_display.copy()
         self.update_overlay(opacity=0.5)
 
         # Slider per regolare l'opacità
@@ -79,20 +109,45 @@ class MapOverlayApp:
 
     def update_overlay(self, opacity):
         """Sovrappone l'immagine con opacità regolabile"""
-        overlay_rgba = self.overlay_display.convert("RGBA")
-        overlay_rgba.putalpha(int(opacity * 255))  # Imposta trasparenza
-
-        # Incolla l'overlay sulla mappa grande
-        self.composite = self.background_display.copy()
-        self.composite.paste(overlay_rgba, self.overlay_pos, overlay_rgba)
-
-        # Aggiorna l'immagine visualizzata
-        self.tk_image = ImageTk.PhotoImage(self.composite)
-        self.image_label.config(image=self.tk_image)
+        alpha = int(opacity * 255) / 255  # Stessi 256 livelli di putalpha
+        self.blended.alpha = alpha
+        if self.view.zoom == 1:
+            self.show_full_view()
+        else:
+            # Ingrandito: solo le tile visibili, già scalate, vengono rifuse e incollate nelle loro PhotoImage
+            self.view.refresh_blend()
+
+    def show_full_view(self):
+        """Mostra il composito della vista intera, rifondendolo se l'opacità è cambiata"""
+        alpha = self.blended.alpha
+        if self.composite_alpha != alpha:
+            # Alpha uniforme: blend diretto dei due layer in cache, solo nella zona dell'overlay
+            blended = Image.blend(self.background_region, self.overlay_display, alpha)
+            self.composite.paste(blended, self.overlay_box[:2])
+            # Stessa PhotoImage, niente nuova allocazione Tk
+            self.tk_image.paste(self.composite)
+            self.composite_alpha = alpha
+        self.view.clear()
+        self.canvas.itemconfigure("full", state=tk.NORMAL)
+
+    def on_view_change(self, view):
+        """Zoom 1: composito unico; ingrandito: tile"""
+        if view.zoom == 1:
+            self.show_full_view()
+        else:
+            self.canvas.itemconfigure("full", state=tk.HIDDEN)
 
     def on_slider_change(self, value):
-        """Aggiorna l'opacità quando lo slider viene mosso"""
-        self.update_overlay(float(value))
+        """Aggiorna l'opacità quando lo slider viene mosso (eventi ravvicinati → un solo render)"""
+        self.pending_opacity = float(value)
+        if self.render_job is None:
+            self.render_job = self.root.after(RENDER_DELAY_MS, self.render_pending)
+
+    def render_pending(self):
+        self.render_job = None
+        opacity, self.pending_opacity = self.pending_opacity, None
+        if opacity is not None:
+            self.update_overlay(opacity)
 
 if __name__ == "__main__":
     root = tk.Tk()
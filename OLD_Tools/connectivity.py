@@ -0,0 +1,89 @@
+from collections import namedtuple
+
+# components: lists of node indices, largest first
+# isolated: nodes without any visible neighbour
+# unreachable: connected nodes outside the largest component (routes to the main network fail)
+# articulation_points: nodes whose removal splits their component
+# bridges: (u, v) edges, u < v, whose removal splits their component ("weak connections")
+ConnectivityReport = namedtuple(
+    "ConnectivityReport", ["components", "isolated", "unreachable", "articulation_points", "bridges"]
+)
+
+
+def connected_components(adj):
+    """Connected components of an undirected adjacency list [(j, dist), ...], largest first."""
+    n = len(adj)
+    component = [-1] * n
+    components = []
+    for root in range(n):
+        if component[root] != -1:
+            continue
+        label = len(components)
+        component[root] = label
+        members = [root]
+        stack = [root]
+        while stack:
+            u = stack.pop()
+            for v, _ in adj[u]:
+                if component[v] == -1:
+                    component[v] = label
+                    members.append(v)
+                    stack.append(v)
+        components.append(sorted(members))
+    components.sort(key=lambda members: (-len(members), members[0]))
+    return components
+
+
+def articulation_points_and_bridges(adj):
+    """Tarjan's low-link DFS (iterative), O(V + E). Returns (sorted cut vertices, sorted bridges)."""
+    n = len(adj)
+    order = [-1] * n
+    low = [0] * n
+    cut = set()
+    bridges = []
+    counter = 0
+    for root in range(n):
+        if order[root] != -1:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        root_children = 0
+        # Frames: (node, parent, iterator over neighbours)
+        stack = [(root, -1, iter(adj[root]))]
+        while stack:
+            u, parent, neighbours = stack[-1]
+            advanced = False
+            for v, _ in neighbours:
+                if v == parent:
+                    continue
+                if order[v] == -1:
+                    order[v] = low[v] = counter
+                    counter += 1
+                    if u == root:
+                        root_children += 1
+                    stack.append((v, u, iter(adj[v])))
+                    advanced = True
+                    break
+                low[u] = min(low[u], order[v])
+            if advanced:
+                continue
+            stack.pop()
+            if parent != -1:
+                low[parent] = min(low[parent], low[u])
+                if low[u] > order[parent]:
+                    bridges.append((min(parent, u), max(parent, u)))
+                if parent != root and low[u] >= order[parent]:
+                    cut.add(parent)
+        if root_children > 1:
+            cut.add(root)
+    return sorted(cut), sorted(bridges)
+
+
+def verify_connectivity(adj):
+    """Structured connectivity report of a visibility graph."""
+    components = connected_components(adj)
+    isolated = sorted(i for i in range(len(adj)) if not adj[i])
+    main = set(components[0]) if components else set()
+    unreachable = sorted(i for i in range(len(adj)) if adj[i] and i not in main)
+    articulation_points, bridges = articulation_points_and_bridges(adj)
+    return ConnectivityReport(components, isolated, unreachable, articulation_points, bridges)
@@ -0,0 +1,131 @@
+import argparse
+import sys
+
+import numpy as np
+
+from nav_grid import NavGrid
+from nav_cache import NavCache, cache_key
+from nav_vec import write_points
+from routing import build_graph, write_matrix
+from spatial_index import PointGrid
+from visibility import LineOfSight
+
+# Defaults recommended in the README for the contour generator
+DEFAULT_SPACING = 3
+DEFAULT_MIN_DIST = 4
+
+
+def distance_to_land(grid, max_dist):
+    """Exact Euclidean distance from each cell to the nearest land cell, capped at max_dist.
+
+    Separable transform: nearest land per column by two vectorized scans, then the row pass
+    only looks max_dist cells to each side, which is exact whenever the true distance is below the cap.
+    """
+    land = np.asarray(grid) != 0
+    height, width = land.shape
+    cap = int(np.ceil(max_dist)) + 1
+    big = cap * cap + 1
+
+    # Vertical distance to the nearest land cell in the same column
+    column = np.where(land, 0, cap).astype(np.int32)  # values stay below cap² + 1
+    for y in range(1, height):
+        np.minimum(column[y], column[y - 1] + 1, out=column[y])
+    for y in range(height - 2, -1, -1):
+        np.minimum(column[y], column[y + 1] + 1, out=column[y])
+    column_sq = np.where(column >= cap, big, column * column)
+
+    # Combine with horizontal offsets: d²(x, y) = min_k k² + column²(x + k, y)
+    best = column_sq.copy()
+    for k in range(1, cap + 1):
+        shifted = np.full_like(column_sq, big)
+        shifted[:, k:] = column_sq[:, :-k]
+        np.minimum(best, shifted + k * k, out=best)
+        shifted[:, :-k] = column_sq[:, k:]
+        shifted[:, -k:] = big
+        np.minimum(best, shifted + k * k, out=best)
+    return np.minimum(np.sqrt(best), max_dist)
+
+
+def contour_candidates(distance, level):
+    """Cells on the edge of the region at least `level` away from land, as (x, y) rows."""
+    inside = distance >= level
+    edge = np.zeros_like(inside)
+    edge[1:, :] |= ~inside[:-1, :]
+    edge[:-1, :] |= ~inside[1:, :]
+    edge[:, 1:] |= ~inside[:, :-1]
+    edge[:, :-1] |= ~inside[:, 1:]
+    ys, xs = np.nonzero(inside & edge)
+    return np.column_stack([xs, ys])
+
+
+def generate_contour_points(grid, spacing=DEFAULT_SPACING, min_dist=DEFAULT_MIN_DIST, levels=1, level_gap=None):
+    """Sample nav points along iso-distance contours around land.
+
+    The first contour runs min_dist cells from land, each further one level_gap (default:
+    max(spacing, min_dist)) further out. Points on a contour are about `spacing` cells apart.
+    """
+    if spacing <= 0 or min_dist <= 0:
+        raise ValueError("spacing and min_dist must be positive")
+    level_gap = level_gap or max(spacing, min_dist)
+    top = min_dist + (levels - 1) * level_gap
+    distance = distance_to_land(grid, top + 1)
+
+    chosen = PointGrid(cell_size=max(1, int(spacing)))
+    min_sep = 0.75 * spacing
+    for level in range(levels):
+        candidates = contour_candidates(distance, min_dist + level * level_gap)
+        if not len(candidates):
+            continue
+        # One candidate per spacing×spacing bucket, then drop those crowding an already chosen point
+        buckets = (candidates[:, 1] // spacing) * (grid.shape[1] // spacing + 1) + candidates[:, 0] // spacing
+        _, first = np.unique(buckets, return_index=True)
+        for x, y in candidates[np.sort(first)].tolist():
+            if not chosen.within(x, y, min_sep):
+                chosen.insert((x, y))
+    return chosen.positions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate nav_vec.dat contour points from nav_matrix.dat")
+    parser.add_argument("nav_matrix", help="input nav_matrix.dat")
+    parser.add_argument("-o", "--output", default="nav_vec.dat", help="output nav_vec.dat path")
+    parser.add_argument("--spacing", type=int, default=DEFAULT_SPACING, help="cells between points on a contour")
+    parser.add_argument("--min-dist", type=int, default=DEFAULT_MIN_DIST, help="cells between the first contour and land")
+    parser.add_argument("--levels", type=int, default=1, help="number of contours around each coast")
+    parser.add_argument("--level-gap", type=int, default=None, help="cells between consecutive contours")
+    parser.add_argument("--matrix", help="also write matrix_int.dat for the generated points to this path")
+    parser.add_argument("--prune", type=float, default=None, metavar="TOL",
+                        help="prune the visibility graph, keeping distances within this relative tolerance (e.g. 0.01)")
+    parser.add_argument("--max-edge", type=float, default=None, help="drop visibility edges longer than this")
+    parser.add_argument("--cache", metavar="DIR", help="reuse outputs of identical earlier runs from this cache directory")
+    args = parser.parse_args(argv)
+
+    grid = NavGrid.open(args.nav_matrix).cells
+    targets = {"nav_vec.dat": args.output}
+    if args.matrix:
+        targets["matrix_int.dat"] = args.matrix
+    if args.cache:
+        cache = NavCache(args.cache)
+        key = cache_key(grid, (), shape=list(grid.shape), spacing=args.spacing, min_dist=args.min_dist,
+                        levels=args.levels, level_gap=args.level_gap, prune=args.prune, max_edge=args.max_edge)
+        if cache.fetch(key, targets):
+            print(f"Up to date: restored {', '.join(targets.values())} from cache ({key[:12]})")
+            return 0
+
+    points = generate_contour_points(grid, args.spacing, args.min_dist, args.levels, args.level_gap)
+    write_points(args.output, points)
+    print(f"Saved {len(points)} contour points to {args.output}")
+
+    if args.matrix:
+        los = LineOfSight(grid, grid.shape[1], grid.shape[0])
+        write_matrix(args.matrix, build_graph(los, points, args.prune, args.max_edge))
+        print(f"Saved {len(points)}x{len(points)} matrix to {args.matrix}")
+
+    if args.cache:
+        for name, path in targets.items():
+            cache.store(key, name, path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,22 @@
 import tkinter as tk
 from tkinter import messagebox
 from PIL import Image, ImageTk
-import struct
+import hashlib
 import math
-import heapq
 import os
+import queue
+import threading
+import time
+
+from visibility import LineOfSight, visible_pairs, build_adjacency
+from connectivity import verify_connectivity
+import contour_points
+from routing import GenerationCancelled, IncrementalRouter, build_graph, write_matrix
+from matrix_int import MatrixInt, check_point_count
+from spatial_index import PointGrid
+from nav_cache import NavCache, cache_key
+from nav_grid import NavGrid
+from nav_vec import read_points, write_points
 
 # Constants
 POINT_RADIUS = 3
@@ -14,47 +26,130 @@ COLOR_NOT_CONNECTED2 = "darkorange"
 NAV_MATRIX_FILE = "nav_matrix.dat"
 VEC_FILE = "nav_vec.dat"
 MATRIX_FILE = "matrix_int.dat"
+IMAGE_FILE = "navigation_map.png"
 
+# Size of the blank grid used when there is no nav_matrix.dat; otherwise the file header decides
 REAL_WIDTH = 640
 REAL_HEIGHT = 472
 
+# Optional visibility-graph pruning for Generate Matrix (None = keep every visible pair)
+PRUNE_TOLERANCE = None  # e.g. 0.01 keeps every route within 1% of its full-graph length
+MAX_EDGE_LENGTH = None
+# Above this many points the N×N incremental state gets too big: the matrix is streamed to disk instead
+INCREMENTAL_MAX_POINTS = 4000
+# How often the Tk loop picks up progress from the matrix generation worker
+PROGRESS_POLL_MS = 100
+
+# Canvas bounds: the grid is scaled to fit inside them, keeping its aspect ratio (640x472 → 2x)
 VIEW_WIDTH = 1280
 VIEW_HEIGHT = 944
 
+# Background palette indexed by cell value: 0 = water (blue), anything else = land (black)
+NAV_PALETTE = [0, 0, 255] + [0, 0, 0] * 255
+
+# Scaled background PhotoImages by (Tk root, cell digest, size), reused when the editor is reopened
+_background_cache = {}
+
+
+def background_image(root, grid, size):
+    """Scaled preview of the grid, built from its cell buffer through NAV_PALETTE in one pass."""
+    key = (root, hashlib.sha1(grid.cells).hexdigest(), size)
+    photo = _background_cache.get(key)
+    if photo is None:
+        image = Image.frombuffer("P", (grid.width, grid.height), grid.cells, "raw", "P", 0, 1)
+        image.putpalette(NAV_PALETTE)
+        photo = ImageTk.PhotoImage(image.resize(size, Image.Resampling.NEAREST), master=root)
+        _background_cache[key] = photo
+    return photo
+
+
+def nearest_neighbor_order(points):
+    """Points chained by nearest distance, starting from the first one."""
+    if not points:
+        return []
+    ordered = [points[0]]
+    remaining = list(points[1:])
+    while remaining:
+        last_x, last_y = ordered[-1]
+        next_point = min(remaining, key=lambda p: math.hypot(p[0] - last_x, p[1] - last_y))
+        ordered.append(next_point)
+        remaining.remove(next_point)
+    return ordered
+
+
+def connectivity_report(grid, points):
+    """Headless part of Verify All: visibility graph of the points and its ConnectivityReport."""
+    los = LineOfSight(grid.cells, grid.width, grid.height)
+    return verify_connectivity(build_adjacency(points, visible_pairs(los, points)))
+
+
+def generate_matrix(path, grid, points, router=None, jobs=None, stage=None, progress=None, cancel=None):
+    """Headless part of Generate Matrix: route the points and write matrix_int.dat to path.
+
+    router (an IncrementalRouter kept in sync with points) is reused when given. Above
+    INCREMENTAL_MAX_POINTS the rows are streamed to disk instead. jobs is the Dijkstra process
+    count (None = all cores). stage(name) reports each step.
+    Returns the routing state to keep for later edits, None when streamed.
+    """
+    stage = stage or (lambda name: None)
+    if len(points) > INCREMENTAL_MAX_POINTS:
+        # Too large to keep in memory: stream rows straight to disk
+        stage("Building visibility graph")
+        los = LineOfSight(grid.cells, grid.width, grid.height)
+        adj = build_graph(los, points, PRUNE_TOLERANCE, MAX_EDGE_LENGTH)
+        stage("Routing and writing rows")
+        write_matrix(path, adj, jobs, progress=progress, cancel=cancel)
+        return None
+    # Reuse the routing state from the last run when point edits kept it in sync,
+    # otherwise build the visibility graph and all-pairs routes from scratch
+    if router is None:
+        stage("Building visibility graph and routes")
+        los = LineOfSight(grid.cells, grid.width, grid.height)
+        router = IncrementalRouter(los, points, jobs, prune_tolerance=PRUNE_TOLERANCE,
+                                   max_edge_length=MAX_EDGE_LENGTH, progress=progress, cancel=cancel)
+    else:
+        print("Reusing incrementally updated routing state")
+    if cancel is not None and cancel.is_set():
+        raise GenerationCancelled("Cancelled before writing")
+    stage("Writing")
+    router.write(path)
+    return router
+
+
 class NavPointEditor:
     def __init__(self, root):
         self.root = root
         self.root.title("Nav Point Editor")
 
-        self.canvas = tk.Canvas(root, width=VIEW_WIDTH, height=VIEW_HEIGHT)
-        self.canvas.pack()
-
-        # Load navigation matrix
+        # Load navigation matrix (memory-mapped, dimensions from its header)
         if os.path.exists(NAV_MATRIX_FILE):
-            with open(NAV_MATRIX_FILE, "rb") as f:
-                # Leggi tutto il file e salta i primi 4 byte
-                data = f.read()[4:]
-                self.nav_matrix = list(data)
+            self.grid = NavGrid.open(NAV_MATRIX_FILE)
         else:
-            self.nav_matrix = [0] * (REAL_WIDTH * REAL_HEIGHT)
+            self.grid = NavGrid.empty(REAL_WIDTH, REAL_HEIGHT)
+
+        self.width = self.grid.width
+        self.height = self.grid.height
+        self.view_scale = min(VIEW_WIDTH / self.width, VIEW_HEIGHT / self.height)
+        self.view_width = round(self.width * self.view_scale)
+        self.view_height = round(self.height * self.view_scale)
 
-        self.width = REAL_WIDTH
-        self.height = REAL_HEIGHT
+        self.canvas = tk.Canvas(root, width=self.view_width, height=self.view_height)
+        self.canvas.pack()
 
         # Create background image
-        nav_img = Image.new("RGB", (self.width, self.height))
-        pixels = nav_img.load()
-        for y in range(self.height):
-            for x in range(self.width):
-                val = self.nav_matrix[y * self.width + x]
-                pixels[x, y] = (0, 0, 255) if val == 0 else (0, 0, 0)
-
-        nav_img_resized = nav_img.resize((VIEW_WIDTH, VIEW_HEIGHT), Image.Resampling.NEAREST)
-        self.bg_image = ImageTk.PhotoImage(nav_img_resized)
+        self.bg_image = background_image(root, self.grid, (self.view_width, self.view_height))
         self.canvas.create_image(0, 0, anchor=tk.NW, image=self.bg_image)
 
         self.points = []  # List of points (x_real, y_real)
         self.dragging_point_index = None
+        self.drag_moved = False
+        self.router = None  # Routing state of the last generated matrix, kept in sync with point edits
+        self.point_index = PointGrid()  # Hit-testing grid, kept in sync with self.points
+        self.point_items = []  # Retained canvas items per point: [oval, index label, error text or None]
+        self.links = []  # links[k]: points k and k+1 are connected (drives the point colors)
+        self.generation = None  # (thread, cancel event, message queue, start time) of the running matrix generation
+        self.generation_stage = None  # (stage name, start time) for the progress label and ETA
+        self.nav_cache = NavCache()  # Artifacts of earlier save_all runs, by content hash
 
         # Bind events
         self.canvas.bind("<Button-1>", self.on_left_click)
@@ -74,9 +169,16 @@ class NavPointEditor:
         self.btn_load_last = tk.Button(self.btn_frame, text="Load Last", command=self.load_last_save)
         self.btn_load_last.pack(side=tk.LEFT, padx=5)
 
+        self.btn_contour = tk.Button(self.btn_frame, text="Generate Contour Points", command=self.generate_contour_points)
+        self.btn_contour.pack(side=tk.LEFT, padx=5)
+
         self.btn_generate_matrix = tk.Button(self.btn_frame, text="Generate Matrix", command=self.generate_matrix_file)
         self.btn_generate_matrix.pack(side=tk.LEFT, padx=5)
 
+        self.btn_cancel_matrix = tk.Button(self.btn_frame, text="Cancel", command=self.cancel_matrix_generation,
+                                           state=tk.DISABLED)
+        self.btn_cancel_matrix.pack(side=tk.LEFT, padx=5)
+
         # Verification buttons
         self.btn_verify_all = tk.Button(self.btn_frame, text="Verify All", command=self.verify_all_points)
         self.btn_verify_all.pack(side=tk.LEFT, padx=5)
@@ -84,10 +186,13 @@ class NavPointEditor:
         self.btn_validate_case = tk.Button(self.btn_frame, text="Validate Case", command=self.validate_specific_case)
         self.btn_validate_case.pack(side=tk.LEFT, padx=5)
 
+        self.progress_label = tk.Label(root, text="")
+        self.progress_label.pack(pady=(0, 5))
+
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
     def is_walkable(self, x, y):
-        if x < 0 or x >= self.width or y < 0 or y >= self.height:
-            return False
-        return self.nav_matrix[y * self.width + x] == 0
+        return self.grid.is_walkable(x, y)
 
     def is_clear_path(self, x0, y0, x1, y1):
         """Bresenham's line algorithm with walkability check"""
@@ -120,92 +225,168 @@ class NavPointEditor:
         
         return self.is_walkable(x1, y1)
 
+    def replace_points(self, points):
+        """Swap in a whole new point list, dropping state that was tied to the old indices."""
+        self.points = points
+        self.router = None
+        self.point_index.rebuild(points)
+
     def on_left_click(self, event):
-        x_real = int(event.x * REAL_WIDTH / VIEW_WIDTH)
-        y_real = int(event.y * REAL_HEIGHT / VIEW_HEIGHT)
-        for i, (px, py) in enumerate(self.points):
-            if abs(px - x_real) <= POINT_RADIUS and abs(py - y_real) <= POINT_RADIUS:
-                self.dragging_point_index = i
-                return
+        x_real, y_real = self.to_real(event.x, event.y)
+        hit = self.point_index.hit(x_real, y_real, POINT_RADIUS)
+        if hit is not None:
+            self.dragging_point_index = hit
+            self.drag_moved = False
+            return
         self.points.append((x_real, y_real))
-        self.draw_points()
+        self.point_index.insert((x_real, y_real))
+        if self.router is not None:
+            self.router.add_point((x_real, y_real))
+        self.point_added()
 
     def on_left_release(self, event):
+        # Update the routing state once per drag, not on every motion event
+        if self.dragging_point_index is not None and self.drag_moved and self.router is not None:
+            i = self.dragging_point_index
+            self.router.move_point(i, self.points[i])
         self.dragging_point_index = None
+        self.drag_moved = False
 
     def on_mouse_drag(self, event):
         if self.dragging_point_index is not None:
-            x_real = int(event.x * REAL_WIDTH / VIEW_WIDTH)
-            y_real = int(event.y * REAL_HEIGHT / VIEW_HEIGHT)
+            x_real, y_real = self.to_real(event.x, event.y)
             x_real = max(0, min(self.width - 1, x_real))
             y_real = max(0, min(self.height - 1, y_real))
             self.points[self.dragging_point_index] = (x_real, y_real)
-            self.draw_points()
+            self.point_index.move(self.dragging_point_index, (x_real, y_real))
+            self.drag_moved = True
+            self.point_moved(self.dragging_point_index)
 
     def remove_point(self, event):
-        x_real = int(event.x * REAL_WIDTH / VIEW_WIDTH)
-        y_real = int(event.y * REAL_HEIGHT / VIEW_HEIGHT)
-        for i, (px, py) in enumerate(self.points):
-            if abs(px - x_real) <= POINT_RADIUS and abs(py - y_real) <= POINT_RADIUS:
-                del self.points[i]
-                break
-        self.draw_points()
+        x_real, y_real = self.to_real(event.x, event.y)
+        i = self.point_index.hit(x_real, y_real, POINT_RADIUS)
+        if i is not None:
+            del self.points[i]
+            self.point_index.remove(i)
+            if self.router is not None:
+                self.router.remove_point(i)
+            self.point_removed(i)
+
+    def neighbor_link(self, k):
+        """True when points k and k+1 are both walkable and the path between them is clear."""
+        x0, y0 = self.points[k]
+        x1, y1 = self.points[k + 1]
+        return self.is_walkable(x0, y0) and self.is_walkable(x1, y1) and self.is_clear_path(x0, y0, x1, y1)
+
+    def point_style(self, i):
+        """(fill color, error text or None) of point i from its walkability and its two neighbour links."""
+        prev_connected = self.links[i - 1] if i > 0 else True
+        next_connected = self.links[i] if i < len(self.points) - 1 else True
+        if not self.is_walkable(*self.points[i]):
+            return "black", 'ERROR NON WALKABLE'  # Completely unwalkable point
+        if not prev_connected and not next_connected:
+            return COLOR_NOT_CONNECTED, 'ERROR'  # Isolated between neighbors
+        if not prev_connected or not next_connected:
+            return "orange", None  # Only one connection missing
+        return COLOR_CONNECTED, None
 
     def draw_points(self):
+        """Full redraw: recompute every neighbour link and recreate all point items."""
         self.canvas.delete("point")
-        for i, (x_real, y_real) in enumerate(self.points):
-            x = x_real * VIEW_WIDTH / REAL_WIDTH
-            y = y_real * VIEW_HEIGHT / REAL_HEIGHT
-            color = COLOR_CONNECTED  # Default color
-            
-            # Check if current point is in walkable area
-            current_walkable = self.is_walkable(x_real, y_real)
-            
-            # Check previous and next points if they exist
-            prev_connected = True
-            next_connected = True
-            
-            if i > 0:  # Has previous point
-                px_prev, py_prev = self.points[i-1]
-                # Check if previous point is walkable AND path is clear
-                prev_walkable = self.is_walkable(px_prev, py_prev)
-                prev_connected = prev_walkable and current_walkable and self.is_clear_path(px_prev, py_prev, x_real, y_real)
-            
-            if i < len(self.points) - 1:  # Has next point
-                px_next, py_next = self.points[i+1]
-                # Check if next point is walkable AND path is clear
-                next_walkable = self.is_walkable(px_next, py_next)
-                next_connected = current_walkable and next_walkable and self.is_clear_path(x_real, y_real, px_next, py_next)
-            
-            # Debug print
-            #print(f"Point {i} at ({x_real},{y_real}) - walkable: {current_walkable}")
-            #if i > 0:
-            #    print(f"  Connection to {i-1}: {prev_connected}")
-            #if i < len(self.points) - 1:
-            #    print(f"  Connection to {i+1}: {next_connected}")
-            
-            # Change color based on connections
-            if not current_walkable:
-                color = "black"  # Completely unwalkable point
-                self.canvas.create_text(x, y + 10, text='ERROR NON WALKABLE', fill="purple", tags="point")
-            elif not prev_connected and not next_connected:
-                color = COLOR_NOT_CONNECTED  # Isolated between neighbors
-                self.canvas.create_text(x, y + 10, text='ERROR', fill="purple", tags="point")
-            elif not prev_connected or not next_connected:
-                color = "orange"  # Only one connection missing
-            
-            self.canvas.create_oval(
-                x - POINT_RADIUS, y - POINT_RADIUS,
-                x + POINT_RADIUS, y + POINT_RADIUS,
-                fill=color, tags="point"
-            )
-            self.canvas.create_text(x, y - 10, text=str(i), fill="white", tags="point")
+        self.links = [self.neighbor_link(k) for k in range(len(self.points) - 1)]
+        self.point_items = []
+        for i in range(len(self.points)):
+            oval = self.canvas.create_oval(0, 0, 0, 0, tags="point")
+            label = self.canvas.create_text(0, 0, text=str(i), fill="white", tags="point")
+            self.point_items.append([oval, label, None])
+            self.update_point_item(i)
+
+    def update_point_item(self, i):
+        """Move and restyle the retained canvas items of point i."""
+        oval, label, error = self.point_items[i]
+        x_real, y_real = self.points[i]
+        x, y = self.to_view(x_real, y_real)
+        color, error_text = self.point_style(i)
+
+        self.canvas.coords(oval, x - POINT_RADIUS, y - POINT_RADIUS, x + POINT_RADIUS, y + POINT_RADIUS)
+        self.canvas.itemconfigure(oval, fill=color)
+        self.canvas.coords(label, x, y - 10)
+        self.canvas.itemconfigure(label, text=str(i))
+        if error_text is None:
+            if error is not None:
+                self.canvas.delete(error)
+                self.point_items[i][2] = None
+        elif error is None:
+            self.point_items[i][2] = self.canvas.create_text(x, y + 10, text=error_text, fill="purple", tags="point")
+        else:
+            self.canvas.coords(error, x, y + 10)
+            self.canvas.itemconfigure(error, text=error_text)
+
+    def refresh_points(self, indices):
+        for i in sorted(set(indices)):
+            if 0 <= i < len(self.points):
+                self.update_point_item(i)
+
+    def point_added(self):
+        """Render the point just appended to self.points."""
+        i = len(self.points) - 1
+        if i > 0:
+            self.links.append(self.neighbor_link(i - 1))
+        oval = self.canvas.create_oval(0, 0, 0, 0, tags="point")
+        label = self.canvas.create_text(0, 0, text=str(i), fill="white", tags="point")
+        self.point_items.append([oval, label, None])
+        self.refresh_points([i - 1, i])
+
+    def point_moved(self, i):
+        """Re-check only the two links touching point i and restyle it and its neighbours."""
+        if i > 0:
+            self.links[i - 1] = self.neighbor_link(i - 1)
+        if i < len(self.points) - 1:
+            self.links[i] = self.neighbor_link(i)
+        self.refresh_points([i - 1, i, i + 1])
+
+    def point_removed(self, i):
+        """Drop the items of the point that was at index i (already deleted from self.points)."""
+        for item in self.point_items.pop(i):
+            if item is not None:
+                self.canvas.delete(item)
+        # Links (i-1, i) and (i, i+1) collapse into one new link (i-1, old i+1)
+        if self.links:
+            if i == 0:
+                del self.links[0]
+            elif i > len(self.points) - 1:
+                del self.links[i - 1]
+            else:
+                del self.links[i]
+                self.links[i - 1] = self.neighbor_link(i - 1)
+        self.refresh_points([i - 1, i])
+        # Points after the removed one keep their style but shift their index label
+        for j in range(i, len(self.points)):
+            self.canvas.itemconfigure(self.point_items[j][1], text=str(j))
+
     def save_all(self, event=None):
+        """Save points, matrix and image, or restore all three from the cache when nothing changed."""
+        if self.generation is not None:
+            print("⚠️ Matrix generation already running")
+            return
+        key = self.save_key()
+        targets = {os.path.basename(path): path for path in (VEC_FILE, MATRIX_FILE, IMAGE_FILE)}
+        if self.nav_cache.fetch(key, targets):
+            print(f"♻️ Nothing changed: restored {', '.join(targets)} from cache ({key[:12]})")
+            return
+
         self.save_points()
-        self.generate_matrix_file()
-        self.save_image()  # Aggiungi questa linea
+        self.nav_cache.store(key, os.path.basename(VEC_FILE), VEC_FILE)
+        # The image is saved once the matrix is written, as before generation moved to a thread
+        self.generate_matrix_file(cache_key=key, screenshot=True)
 
-    def save_image(self, filename="navigation_map.png"):
+    def save_key(self):
+        """Nav cache key of what save_all writes: the grid, the points and the generator settings."""
+        return cache_key(self.grid.cells, self.points, width=self.width, height=self.height,
+                         view=[self.view_width, self.view_height], prune_tolerance=PRUNE_TOLERANCE,
+                         max_edge_length=MAX_EDGE_LENGTH)
+
+    def save_image(self, filename=IMAGE_FILE):
         """Salva l'immagine corrente del canvas come file PNG"""
         try:
             # Crea un'immagine PIL dal canvas
@@ -218,270 +399,262 @@ class NavPointEditor:
             # Cattura l'area del canvas
             ImageGrab.grab().crop((x, y, x1, y1)).save(filename)
             print(f"Immagine salvata come {filename}")
+            return True
         except Exception as e:
             print(f"Errore nel salvataggio dell'immagine: {str(e)}")
+            return False
 
 
     def save_points(self):
-        with open(VEC_FILE, "wb") as f:
-            f.write(struct.pack("<H", len(self.points)))
-            f.write(b"\x00\x00")  # Padding
-            for x, y in self.points:
-                f.write(struct.pack("<2H", x, y))
+        write_points(VEC_FILE, self.points)
         print(f"Saved {len(self.points)} points to {VEC_FILE}")
 
     def load_last_save(self):
         """Load last saved points from file and reorder them by distance"""
         try:
-            with open(VEC_FILE, "rb") as f:
-                data = f.read()
-                num_points = struct.unpack("<H", data[:2])[0]
-                raw_points = []
-                
-                for i in range(num_points):
-                    offset = 4 + i * 4
-                    x, y = struct.unpack("<2H", data[offset:offset+4])
-                    raw_points.append((x, y))
-                
-                if not raw_points:
-                    messagebox.showinfo("Info", "No points found in file.")
-                    return
+            raw_points = [tuple(p) for p in read_points(VEC_FILE).tolist()]
+            num_points = len(raw_points)
 
-                # --- Riordina i punti in base alla distanza (nearest neighbor) ---
-                ordered = [raw_points[0]]
-                remaining = raw_points[1:]
-                
-                while remaining:
-                    last_x, last_y = ordered[-1]
-                    # Trova il punto più vicino
-                    next_point = min(remaining, key=lambda p: math.hypot(p[0] - last_x, p[1] - last_y))
-                    ordered.append(next_point)
-                    remaining.remove(next_point)
+            if not raw_points:
+                messagebox.showinfo("Info", "No points found in file.")
+                return
 
-                # Aggiorna lista punti e disegna
-                self.points = ordered
-                self.draw_points()
+            # --- Riordina i punti in base alla distanza (nearest neighbor) ---
+            ordered = nearest_neighbor_order(raw_points)
 
-                print(f"Loaded and reordered {num_points} points from last save (by nearest distance)")
+            # Aggiorna lista punti e disegna
+            self.replace_points(ordered)
+            self.draw_points()
+
+            print(f"Loaded and reordered {num_points} points from last save (by nearest distance)")
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load points: {str(e)}")
 
 
-    def generate_matrix_file(self):
+    def generate_contour_points(self):
+        """Replace the points with ones sampled along the coasts (README defaults: spacing 3, 4 from land)"""
+        if self.points and not messagebox.askyesno("Contour Points", "Replace the current points?"):
+            return
+        self.replace_points(contour_points.generate_contour_points(self.grid.cells))
+        self.draw_points()
+        print(f"Generated {len(self.points)} contour points")
+
+    def generate_matrix_file(self, cache_key=None, screenshot=False):
+        """Start generating matrix_int.dat on a worker thread; the Tk loop polls it for progress.
+
+        With a cache_key the finished matrix is also stored in the nav cache under that key.
+        With screenshot the map image is saved (and cached) after the matrix has been written.
+        """
+        if self.generation is not None:
+            print("⚠️ Matrix generation already running")
+            return
         num_points = len(self.points)
-        matrix_data = bytearray()
-        
+        try:
+            check_point_count(num_points)
+        except ValueError as e:
+            print(f"❌ {e}")
+            messagebox.showerror("Error", str(e))
+            return
+
         print(f"\nGenerating matrix for {num_points} points (using float distances)...")
-        
-        # Build adjacency list with floating-point distances
-        adj = [[] for _ in range(num_points)]
-        for i in range(num_points):
-            for j in range(num_points):
-                if i != j and self.is_clear_path(*self.points[i], *self.points[j]):
-                    dx = self.points[i][0] - self.points[j][0]
-                    dy = self.points[i][1] - self.points[j][1]
-                    dist = math.sqrt(dx*dx + dy*dy)  # Now a float
-                    adj[i].append((j, dist))
-                    # Debug print for direct connections
-                    if i == 0 and j == 9:
-                        print(f"Direct connection 0→9: distance={dist:.7f}")
-        
-        # Generate routing matrix using Dijkstra's algorithm with float distances
-        for i in range(num_points):
-            # Debug print for source point
-            if i == 0:
-                print(f"\nCalculating paths from point 0 ({self.points[i]})")
-            
-            # Dijkstra's algorithm with float distances
-            dist = [math.inf] * num_points
-            prev = [-1] * num_points
-            dist[i] = 0.0
-            heap = [(0.0, i)]
-            
-            while heap:
-                current_dist, u = heapq.heappop(heap)
-                if current_dist > dist[u]:
-                    continue
-                for v, weight in adj[u]:
-                    if dist[v] > dist[u] + weight:
-                        dist[v] = dist[u] + weight
-                        prev[v] = u
-                        heapq.heappush(heap, (dist[v], v))
-            
-            # Generate matrix entries for current node
-            for j in range(num_points):
-                if i == 0 and j == 9:  # Debug for specific case
-                    print(f"Path 0→9: total_dist={dist[j]:.7f}, path={self.get_path(prev, j)}")
-                
-                if i == j:
-                    # Self-connection
-                    matrix_data += struct.pack("<f", 0.0)  # 4-byte float
-                    matrix_data += struct.pack("<H", i)     # 2-byte unsigned short
-                elif dist[j] == math.inf:
-                    # No path exists
-                    matrix_data += struct.pack("<f", 0.0)
-                    matrix_data += struct.pack("<H", 0)
-                else:
-                    # Find first hop
-                    next_hop = j
-                    while prev[next_hop] != i and prev[next_hop] != -1:
-                        next_hop = prev[next_hop]
-                    
-                    if prev[next_hop] == -1:  # Shouldn't happen for reachable nodes
-                        matrix_data += struct.pack("<f", 0.0)
-                        matrix_data += struct.pack("<H", 0)
-                    else:
-                        # Debug for specific case
-                        if i == 0 and j == 9:
-                            print(f"Final entry: dist={dist[j]:.7f}, next_hop={next_hop}")
-                        
-                        # Ensure distance is reasonable
-                        if dist[j] > 100000.0:  # Arbitrary large number
-                            print(f"Warning: Large distance {dist[j]:.7f} from {i} to {j}")
-                        
-                        distance_fixed_point = int(round(dist[j] * 65536))
-                        matrix_data += struct.pack("<I", distance_fixed_point)  # 4-byte float
-                        matrix_data += struct.pack("<H", next_hop)  # 2-byte unsigned short
-
-        with open(MATRIX_FILE, "wb") as f:
-            f.write(matrix_data)
-        
+
+        # The worker owns the routing state while it runs. Edits made meanwhile are not applied
+        # to it, so it is only kept afterwards if the points are still the same.
+        router = self.router if self.router is not None and self.router.points == self.points else None
+        self.router = None
+        cancel = threading.Event()
+        messages = queue.Queue()
+        thread = threading.Thread(target=self.matrix_worker,
+                                  args=(list(self.points), router, cancel, messages, cache_key, screenshot),
+                                  daemon=True)
+        self.generation = (thread, cancel, messages, time.monotonic())
+        self.generation_stage = ("Starting", self.generation[3])
+        self.btn_generate_matrix.config(state=tk.DISABLED)
+        self.btn_cancel_matrix.config(state=tk.NORMAL)
+        self.progress_label.config(text="Generating matrix…")
+        thread.start()
+        self.root.after(PROGRESS_POLL_MS, self.poll_matrix_generation)
+
+    def matrix_worker(self, points, router, cancel, messages, cache_key=None, screenshot=False):
+        """Body of the generation thread. Never touches Tk: everything goes through messages."""
+        def progress(done, total):
+            messages.put(("progress", done, total))
+
+        try:
+            router = generate_matrix(MATRIX_FILE, self.grid, points, router,
+                                     stage=lambda name: messages.put(("stage", name)),
+                                     progress=progress, cancel=cancel)
+            messages.put(("done", router, len(points), cache_key, screenshot))
+        except GenerationCancelled:
+            messages.put(("cancelled", router))
+        except Exception as e:
+            messages.put(("failed", e))
+
+    def poll_matrix_generation(self):
+        thread, cancel, messages, _ = self.generation
+        result = None
+        latest = None
+        while result is None:
+            try:
+                message = messages.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == "stage":
+                self.generation_stage = (message[1], time.monotonic())
+                latest = None
+                self.progress_label.config(text=f"{message[1]}…")
+            elif message[0] == "progress":
+                latest = message[1:]
+            else:
+                result = message
+
+        if latest is not None and not cancel.is_set():
+            done, total = latest
+            stage, started = self.generation_stage
+            remaining = (time.monotonic() - started) / done * (total - done)
+            self.progress_label.config(
+                text=f"{stage}: {done}/{total} rows ({done / total:.0%}), ETA {remaining:.0f} s")
+        if result is None:
+            self.root.after(PROGRESS_POLL_MS, self.poll_matrix_generation)
+            return
+        thread.join()
+        self.finish_matrix_generation(result)
+
+    def finish_matrix_generation(self, result):
+        elapsed = time.monotonic() - self.generation[3]
+        self.generation = None
+        self.btn_generate_matrix.config(state=tk.NORMAL)
+        self.btn_cancel_matrix.config(state=tk.DISABLED)
+        kind = result[0]
+
+        if kind == "failed":
+            self.progress_label.config(text="Matrix generation failed")
+            print(f"❌ Matrix generation failed: {result[1]}")
+            messagebox.showerror("Error", f"Matrix generation failed: {result[1]}")
+            return
+
+        router = result[1]
+        if router is not None and router.points == self.points:
+            self.router = router
+        if kind == "cancelled":
+            self.progress_label.config(text=f"Matrix generation cancelled, {MATRIX_FILE} left unchanged")
+            print(f"🛑 Matrix generation cancelled, {MATRIX_FILE} left unchanged")
+            return
+
+        num_points, key, screenshot = result[2:]
+        if key is not None:
+            self.nav_cache.store(key, os.path.basename(MATRIX_FILE), MATRIX_FILE)
+        # Debug print for direct connections
+        if router is not None and num_points > 9 and 9 in router.neighbors[0]:
+            print(f"Direct connection 0→9: distance={router.neighbors[0][9]:.7f}")
+
         # Verify the written data for the specific case
-        offset = (0 * num_points + 9) * 6  # Still 6 bytes per entry (4 float + 2 short)
-        if offset + 6 <= len(matrix_data):
-            written_dist, written_next = struct.unpack_from("<fH", matrix_data, offset)
-            print(f"\nWritten data for 0→9: dist={written_dist:.7f}, next={written_next}")
-        
-        print(f"Generated matrix with {len(matrix_data)} bytes ({num_points}x{num_points} nodes)")
-
-    def get_path(self, prev, j):
-        """Helper to reconstruct path for debugging"""
-        path = []
-        while j != -1:
-            path.append(j)
-            j = prev[j]
-        return path[::-1]
+        if num_points > 9:
+            with MatrixInt(MATRIX_FILE, num_points) as matrix:
+                written_dist, written_next = matrix.entry(0, 9)
+            print(f"\nWritten data for 0→9: dist={written_dist / 65536:.7f}, next={written_next}")
+
+        self.progress_label.config(text=f"Matrix written ({num_points}x{num_points} nodes) in {elapsed:.1f} s")
+        print(f"Generated matrix with {num_points * num_points * 6} bytes ({num_points}x{num_points} nodes) "
+              f"in {elapsed:.1f} s")
+
+        if screenshot and self.save_image(IMAGE_FILE):
+            # Points edited during the generation are in the image but not in the matrix: don't cache it then
+            if key is not None and self.save_key() == key:
+                self.nav_cache.store(key, os.path.basename(IMAGE_FILE), IMAGE_FILE)
+
+    def cancel_matrix_generation(self):
+        if self.generation is not None:
+            self.generation[1].set()
+            self.btn_cancel_matrix.config(state=tk.DISABLED)
+            self.progress_label.config(text="Cancelling…")
+
+    def on_close(self):
+        """Cancel a running generation and wait for it, so no partial file is left behind."""
+        if self.generation is not None:
+            thread, cancel, _, _ = self.generation
+            cancel.set()
+            thread.join()
+        self.root.destroy()
+
     def reorder_points_by_distance(self):
         """Riordina i punti esistenti in base alla distanza progressiva (nearest neighbor)"""
         if not self.points:
             return
         
-        ordered = [self.points[0]]
-        remaining = self.points[1:]
-        
-        while remaining:
-            last_x, last_y = ordered[-1]
-            next_point = min(remaining, key=lambda p: math.hypot(p[0] - last_x, p[1] - last_y))
-            ordered.append(next_point)
-            remaining.remove(next_point)
-        
-        self.points = ordered
+        self.replace_points(nearest_neighbor_order(self.points))
         self.draw_points()
         print(f"🔄 Points reordered by nearest distance before verification ({len(self.points)} total)")
 
     def verify_all_points(self):
-        """Verify connectivity between all points"""
+        """Verify connectivity between all points on the visibility graph"""
         print("\n=== Full Connectivity Verification ===")
         self.reorder_points_by_distance()
-        num_points = len(self.points)
-        
-        # Build connectivity matrix
-        connectivity = [[False]*num_points for _ in range(num_points)]
-        for i in range(num_points):
-            for j in range(num_points):
-                if i != j:
-                    connectivity[i][j] = self.is_clear_path(*self.points[i], *self.points[j])
-        
-        # Find isolated points
-        isolated_points = []
-        for i in range(num_points):
-            has_incoming = any(connectivity[j][i] for j in range(num_points) if j != i)
-            has_outgoing = any(connectivity[i][j] for j in range(num_points) if j != i)
-            if not has_incoming and not has_outgoing:
-                isolated_points.append(i)
-        
-        # Find problematic pairs
-        problematic_pairs = []
-        for i in range(num_points):
-            for j in range(i+1, num_points):
-                if connectivity[i][j] or connectivity[j][i]:
-                    i_has_others = any(connectivity[i][k] or connectivity[k][i] 
-                                     for k in range(num_points) if k != i and k != j)
-                    j_has_others = any(connectivity[j][k] or connectivity[k][j] 
-                                     for k in range(num_points) if k != i and k != j)
-                    
-                    if not i_has_others or not j_has_others:
-                        problematic_pairs.append((i, j, not i_has_others, not j_has_others))
-        
-        # Find unreachable points
-        unreachable_points = []
-        for i in range(num_points):
-            if i not in isolated_points:
-                has_incoming = any(connectivity[j][i] for j in range(num_points) if j != i)
-                if not has_incoming:
-                    unreachable_points.append(i)
-        
+
+        report = connectivity_report(self.grid, self.points)
+
         # Display results
         self.canvas.delete("verification")
-        
+
         # Highlight isolated points (red)
-        for i in isolated_points:
-            x, y = self.points[i]
-            x_view = x * VIEW_WIDTH / REAL_WIDTH
-            y_view = y * VIEW_HEIGHT / REAL_HEIGHT
+        for i in report.isolated:
+            x_view, y_view = self.to_view(*self.points[i])
             self.canvas.create_oval(x_view-8, y_view-8, x_view+8, y_view+8,
                                   outline="red", width=3, tags="verification")
-            self.canvas.create_text(x_view, y_view-15, text=f"ISOLATED {i}", 
+            self.canvas.create_text(x_view, y_view-15, text=f"ISOLATED {i}",
                                   fill="red", font=('Helvetica', 10, 'bold'), tags="verification")
-        
-        # Highlight unreachable points (purple)
-        for i in unreachable_points:
-            x, y = self.points[i]
-            x_view = x * VIEW_WIDTH / REAL_WIDTH
-            y_view = y * VIEW_HEIGHT / REAL_HEIGHT
+
+        # Highlight points cut off from the main network (purple)
+        for i in report.unreachable:
+            x_view, y_view = self.to_view(*self.points[i])
             self.canvas.create_oval(x_view-6, y_view-6, x_view+6, y_view+6,
                                   outline="purple", width=3, tags="verification")
-            self.canvas.create_text(x_view, y_view-15, text=f"UNREACHABLE {i}", 
+            self.canvas.create_text(x_view, y_view-15, text=f"UNREACHABLE {i}",
                                   fill="purple", font=('Helvetica', 10, 'bold'), tags="verification")
-        
-        # Highlight problematic connections (orange)
-        for i, j, _, _ in problematic_pairs:
-            x1, y1 = self.points[i]
-            x2, y2 = self.points[j]
-            x1_view = x1 * VIEW_WIDTH / REAL_WIDTH
-            y1_view = y1 * VIEW_HEIGHT / REAL_HEIGHT
-            x2_view = x2 * VIEW_WIDTH / REAL_WIDTH
-            y2_view = y2 * VIEW_HEIGHT / REAL_HEIGHT
+
+        # Highlight weak connections (orange): bridges and the points that hold them
+        for i, j in report.bridges:
+            x1_view, y1_view = self.to_view(*self.points[i])
+            x2_view, y2_view = self.to_view(*self.points[j])
             self.canvas.create_line(x1_view, y1_view, x2_view, y2_view,
                                   fill="orange", width=2, tags="verification")
-        
+        for i in report.articulation_points:
+            x_view, y_view = self.to_view(*self.points[i])
+            self.canvas.create_oval(x_view-6, y_view-6, x_view+6, y_view+6,
+                                  outline="orange", width=2, tags="verification")
+
         # Print results
-        if isolated_points:
+        print(f"Components: {len(report.components)} (sizes: {[len(c) for c in report.components[:10]]})")
+
+        if report.isolated:
             print("\n🔴 ISOLATED POINTS:")
-            for i in isolated_points:
+            for i in report.isolated:
                 print(f" - Point {i} {self.points[i]} (no connections)")
-        
-        if unreachable_points:
+
+        if report.unreachable:
             print("\n🟣 UNREACHABLE POINTS:")
-            for i in unreachable_points:
-                print(f" - Point {i} {self.points[i]} (no incoming connections)")
-        
-        if problematic_pairs:
-            print("\n🟠 PROBLEMATIC PAIRS:")
-            for i, j, i_isolated, j_isolated in problematic_pairs:
-                print(f" - Points {i} and {j}:")
-                print(f"   - Connection {i}→{j}: {'✅' if connectivity[i][j] else '❌'}")
-                print(f"   - Connection {j}→{i}: {'✅' if connectivity[j][i] else '❌'}")
-                if i_isolated and j_isolated:
-                    print("   - BOTH ISOLATED (only connected to each other)")
-                elif i_isolated:
-                    print(f"   - POINT {i} ISOLATED (only connected to {j})")
-                else:
-                    print(f"   - POINT {j} ISOLATED (only connected to {i})")
-        
-        if not isolated_points and not unreachable_points and not problematic_pairs:
+            for i in report.unreachable:
+                print(f" - Point {i} {self.points[i]} (not connected to the main network)")
+
+        if report.bridges:
+            print("\n🟠 WEAK CONNECTIONS (bridges):")
+            for i, j in report.bridges:
+                print(f" - Points {i} and {j}: the only link between two parts of the network")
+
+        if report.articulation_points:
+            print("\n🟠 CRITICAL POINTS (removing one splits the network):")
+            print(f" - {report.articulation_points}")
+
+        if not report.isolated and not report.unreachable and not report.bridges:
             print("✅ No connectivity issues found")
+        return report
+
+    def to_view(self, x_real, y_real):
+        return x_real * self.view_width / self.width, y_real * self.view_height / self.height
+
+    def to_real(self, x_view, y_view):
+        return int(x_view * self.width / self.view_width), int(y_view * self.height / self.view_height)
 
     def validate_specific_case(self):
         """Validate connectivity between two specific points"""
@@ -528,24 +701,12 @@ class NavPointEditor:
             # Load matrix data if exists
             matrix_values = {}
             if os.path.exists(MATRIX_FILE):
-                with open(MATRIX_FILE, "rb") as f:
-                    data = f.read()
-                    num_points = int(math.sqrt(len(data)/6))  # Each entry is 6 bytes (4 distance + 2 nextnode)
-                    
+                # Only the two requested entries are touched through the memory map
+                with MatrixInt(MATRIX_FILE) as matrix:
+                    num_points = len(matrix)
                     if source < num_points and dest < num_points:
-                        # Calculate offsets
-                        offset_source_dest = (source * num_points + dest) * 6
-                        offset_dest_source = (dest * num_points + source) * 6
-                        
-                        # Read source->dest
-                        if offset_source_dest + 6 <= len(data):
-                            dist_source_dest, next_source_dest = struct.unpack_from("<IH", data, offset_source_dest)
-                            matrix_values['source_dest'] = (dist_source_dest, next_source_dest)
-                        
-                        # Read dest->source
-                        if offset_dest_source + 6 <= len(data):
-                            dist_dest_source, next_dest_source = struct.unpack_from("<IH", data, offset_dest_source)
-                            matrix_values['dest_source'] = (dist_dest_source, next_dest_source)
+                        matrix_values['source_dest'] = matrix.entry(source, dest)
+                        matrix_values['dest_source'] = matrix.entry(dest, source)
             
             # Show results
             result = tk.Toplevel(self.root)
@@ -618,10 +779,8 @@ class NavPointEditor:
         x1, y1 = self.points[source]
         x2, y2 = self.points[dest]
         
-        x1_view = x1 * VIEW_WIDTH / REAL_WIDTH
-        y1_view = y1 * VIEW_HEIGHT / REAL_HEIGHT
-        x2_view = x2 * VIEW_WIDTH / REAL_WIDTH
-        y2_view = y2 * VIEW_HEIGHT / REAL_HEIGHT
+        x1_view, y1_view = self.to_view(x1, y1)
+        x2_view, y2_view = self.to_view(x2, y2)
         
         # Draw points
         self.canvas.create_oval(x1_view-8, y1_view-8, x1_view+8, y1_view+8,
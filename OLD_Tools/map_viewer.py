@@ -1,14 +1,28 @@
-import struct
+import argparse
+import json
+import sys
+import time
 import tkinter as tk
-from PIL import Image, ImageTk, ImageDraw
+from PIL import Image, ImageDraw
+import numpy as np
 import os
 
+from matrix_int import MatrixInt
+from routes import RouteService, ROUTE_OK, validate_routes
+from spatial_index import PointGrid
+from nav_grid import NavGrid, read_size
+from nav_vec import read_points
+from tile_pyramid import TilePyramid, TiledView
+
 # === Config ===
 MAP_PATH = "test.bmp"
 NAV_VEC_PATH = "nav_vec.dat"
 MATRIX_PATH = "matrix_int.dat"
+NAV_MATRIX_PATH = "nav_matrix.dat"
 
 # Coordinate originali e reali
+# OLD_*: stock nav grid, used when there is no nav_matrix.dat (otherwise its header decides, see grid_size)
+# REAL_*, BORDER_OFFSET: game map coordinates (2400x1800 image minus the 64px frame), independent of the grid
 OLD_WIDTH, OLD_HEIGHT = 640, 472
 REAL_WIDTH, REAL_HEIGHT = 2272, 1672
 VIEW_WIDTH, VIEW_HEIGHT = 1080, 720
@@ -18,39 +32,62 @@ BORDER_OFFSET = 64
 SCALE_X = VIEW_WIDTH / (REAL_WIDTH + ( 2 * BORDER_OFFSET ) )
 SCALE_Y = VIEW_HEIGHT / (REAL_HEIGHT + ( 2 * BORDER_OFFSET ) )
 
-def scale_and_offset(x, y):
-    """Scala da coordinate originali (640x472) a coordinate finali su canvas."""
-    x_real = x * REAL_WIDTH / OLD_WIDTH + BORDER_OFFSET
-    y_real = y * REAL_HEIGHT / OLD_HEIGHT + BORDER_OFFSET
-    x_canvas = int(x_real * SCALE_X)
-    y_canvas = int(y_real * SCALE_Y)
+# Layer di collisione: acqua blu, terra nera, fusi al 50% con la mappa
+COLLISION_PALETTE = [0, 0, 255] + [0, 0, 0] * 255
+COLLISION_ALPHA = 0.5
+POINT_RADIUS = 2
+
+def grid_size(nav_matrix_path=NAV_MATRIX_PATH):
+    """(larghezza, altezza) della griglia dall'header di nav_matrix.dat, OLD_WIDTH x OLD_HEIGHT se manca."""
+    return read_size(nav_matrix_path) if os.path.exists(nav_matrix_path) else (OLD_WIDTH, OLD_HEIGHT)
+
+def scale_coords(coords, size=(OLD_WIDTH, OLD_HEIGHT)):
+    """Scala un array (N, 2) di coordinate della griglia size = (larghezza, altezza) in coordinate canvas intere."""
+    grid_width, grid_height = size
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    x_real = coords[:, 0] * REAL_WIDTH / grid_width + BORDER_OFFSET
+    y_real = coords[:, 1] * REAL_HEIGHT / grid_height + BORDER_OFFSET
+    return (x_real * SCALE_X).astype(np.int64), (y_real * SCALE_Y).astype(np.int64)
+
+def scale_and_offset(x, y, size=(OLD_WIDTH, OLD_HEIGHT)):
+    """Scala da coordinate originali (griglia size) a coordinate finali su canvas."""
+    x_canvas, y_canvas = (int(v[0]) for v in scale_coords((x, y), size))
     print(f"Scaled ({x}, {y}) to canvas coordinates ({x_canvas}, {y_canvas})")
     return x_canvas, y_canvas
 
 # === Load Points ===
-def load_points(path):
-    with open(path, 'rb') as f:
-        num_points = struct.unpack('<I', f.read(4))[0]
-        points = []
-        for _ in range(num_points):
-            x = struct.unpack('<H', f.read(2))[0]
-            y = struct.unpack('<H', f.read(2))[0]
-            scaled = scale_and_offset(x, y)
-            points.append(scaled)
-    return points
+def load_points(path, size=(OLD_WIDTH, OLD_HEIGHT)):
+    """Punti di nav_vec.dat (griglia size) in coordinate canvas, convertiti tutti insieme."""
+    coords = read_points(path)
+    x_canvas, y_canvas = scale_coords(coords, size)
+    print(f"Caricati {len(coords)} punti da {path}")
+    return list(zip(x_canvas.tolist(), y_canvas.tolist()))
+
+# === Map layers ===
+def map_layers(map_path, nav_matrix_path=NAV_MATRIX_PATH):
+    """Tile pyramids of the full-resolution map and, if the grid exists, of the map with the collision grid on top."""
+    final_size = (REAL_WIDTH + 2 * BORDER_OFFSET, REAL_HEIGHT + 2 * BORDER_OFFSET)
+    img = Image.open(map_path).convert("RGB")
+    if img.size != final_size:
+        img = img.resize(final_size)
+    layers = {"map": TilePyramid(img)}
+
+    if os.path.exists(nav_matrix_path):
+        grid = NavGrid.open(nav_matrix_path)
+        cells = Image.frombuffer("P", (grid.width, grid.height), grid.cells, "raw", "P", 0, 1)
+        cells.putpalette(COLLISION_PALETTE)
+        # Ogni cella copre la sua area reale (stessa mappatura di scale_and_offset), senza sfumature
+        cells = cells.convert("RGB").resize((REAL_WIDTH, REAL_HEIGHT), Image.Resampling.NEAREST)
+        box = (BORDER_OFFSET, BORDER_OFFSET, BORDER_OFFSET + REAL_WIDTH, BORDER_OFFSET + REAL_HEIGHT)
+        collision = img.copy()
+        collision.paste(Image.blend(img.crop(box), cells, COLLISION_ALPHA), box[:2])
+        layers["collision"] = TilePyramid(collision)
+    return layers
 
 # === Load Matrix ===
 def load_matrix(path, num_points):
-    matrix = []
-    with open(path, 'rb') as f:
-        for i in range(num_points):
-            row = []
-            for j in range(num_points):
-                dist = struct.unpack('<I', f.read(4))[0]
-                next_node = struct.unpack('<H', f.read(2))[0]
-                row.append((dist, next_node))
-            matrix.append(row)
-    return matrix
+    """Memory-mapped matrix: matrix[a][b] unpacks as (dist, next_node), nothing is read up front."""
+    return MatrixInt(path, num_points)
 
 
 def trova_percorso(matrix, points, start, end, max_steps=1000):
@@ -100,7 +137,7 @@ def trova_percorso(matrix, points, start, end, max_steps=1000):
     return path
 
 
-# === Get path from A to B using next_node links ===
+# === Get path from A to B using next_node links (verbose trace, see RouteService for the quiet one) ===
 def get_path(matrix, a, b, points=None):
     path = [a]
     visited = set()
@@ -157,65 +194,103 @@ def get_path(matrix, a, b, points=None):
 
 # === GUI ===
 class MapApp:
-    def __init__(self, root, map_path, points, matrix):
+    def __init__(self, root, map_path, points, matrix, nav_matrix_path=NAV_MATRIX_PATH):
         self.root = root
         self.points = points
         self.matrix = matrix
+        self.routes = RouteService(matrix)
+        self.point_index = PointGrid(points, cell_size=12)
         self.selected = []
 
         self.canvas = tk.Canvas(root, width=VIEW_WIDTH, height=VIEW_HEIGHT)
         self.canvas.pack()
 
-        # Carica e ridimensiona l'immagine
-        img = Image.open(map_path)
-        img = img.resize((VIEW_WIDTH, VIEW_HEIGHT))
-        self.tk_img = ImageTk.PhotoImage(img)
-        self.canvas.create_image(0, 0, anchor='nw', image=self.tk_img)
+        self.nav_matrix_path = nav_matrix_path
+        # Mappa a tile: solo le tile visibili vengono caricate, al livello di dettaglio dello zoom
+        # Le coordinate dei punti restano quelle del canvas a zoom 1; view.to_screen le porta a schermo
+        self.layers = map_layers(map_path, nav_matrix_path)
+        self.view = TiledView(self.canvas, self.layers, (SCALE_X, SCALE_Y), (VIEW_WIDTH, VIEW_HEIGHT),
+                              on_change=self.place_overlay)
+        self.view.bind()
+        self.view.render()
+
+        # Elementi disegnati sopra la mappa: item -> (coordinate a zoom 1, raggio o None per le linee)
+        self.overlay = {}
 
         # Disegna tutti i punti
         for i, (x, y) in enumerate(points):
-            self.canvas.create_oval(x - 2, y - 2, x + 2, y + 2, fill='red', tags=("point", str(i)))
+            self.add_overlay(self.canvas.create_oval(0, 0, 0, 0, fill='red', tags=("point", str(i))),
+                             (x, y), POINT_RADIUS)
 
         # Gestione eventi
         self.canvas.bind("<Button-1>", self.on_click)
         self.canvas.bind("<Button-3>", self.clear_paths)
         self.root.bind("<s>", self.save_image_with_points)
         self.root.bind("<S>", self.save_image_with_points)
+        self.root.bind("<c>", self.toggle_collision)
 
         self.label = tk.Label(root, text="Click due punti per mostrare il percorso", font=("Arial", 14))
         self.label.pack()
-
-
+        tk.Label(root, text="Rotella: zoom | Tasto centrale / frecce: sposta | Home: vista intera | C: collisioni").pack()
+
+    # === Overlay ===
+    def add_overlay(self, item, coords, radius=None):
+        self.overlay[item] = (coords, radius)
+        self.place_item(item, coords, radius)
+
+    def place_item(self, item, coords, radius):
+        screen = []
+        for x, y in zip(coords[::2], coords[1::2]):
+            screen.extend(self.view.to_screen(x, y))
+        if radius is None:
+            self.canvas.coords(item, *screen)
+        else:
+            # I cerchi mantengono la stessa dimensione a schermo a qualsiasi zoom
+            x, y = screen
+            self.canvas.coords(item, x - radius, y - radius, x + radius, y + radius)
+
+    def place_overlay(self, view=None):
+        """Riposiziona punti e percorsi dopo pan o zoom."""
+        for item, (coords, radius) in self.overlay.items():
+            self.place_item(item, coords, radius)
+
+    def toggle_collision(self, event=None):
+        if "collision" not in self.layers:
+            self.label.config(text=f"⚠️ {self.nav_matrix_path} non trovato: nessun layer di collisione")
+            return
+        self.view.set_layer("map" if self.view.layer == "collision" else "collision")
 
     def on_click(self, event):
-        x, y = event.x, event.y
+        x, y = self.view.to_world(event.x, event.y)
         clicked = self.find_nearest_point(x, y)
         if clicked is not None:
             self.selected.append(clicked)
             px, py = self.points[clicked]
-            self.canvas.create_oval(px - 4, py - 4, px + 4, py + 4, outline='blue', width=2, tags="path")
+            self.add_overlay(self.canvas.create_oval(0, 0, 0, 0, outline='blue', width=2, tags="path"), (px, py), 4)
             if len(self.selected) == 2:
                 self.show_path()
                 self.selected.clear()
 
     def find_nearest_point(self, x, y):
-        for i, (px, py) in enumerate(self.points):
-            if abs(px - x) < 6 and abs(py - y) < 6:
-                return i
-        return None
+        # Tolleranza di 6 pixel a schermo, qualunque sia lo zoom
+        return self.point_index.hit(x, y, 6 / self.view.zoom, strict=True)
 
     def show_path(self):
         a, b = self.selected
-        path = get_path(self.matrix, a, b)
-        total_dist = 0
+        route = self.routes.route(a, b)
+        path = route.nodes
         for i in range(len(path) - 1):
             x1, y1 = self.points[path[i]]
             x2, y2 = self.points[path[i + 1]]
-            self.canvas.create_line(x1, y1, x2, y2, fill='lime', width=2, tags="path")
-            total_dist += self.matrix[path[i]][path[i + 1]][0]
-        self.label.config(text=f"Percorso: {' -> '.join(map(str, path))} | Distanza totale: {total_dist}")
+            self.add_overlay(self.canvas.create_line(0, 0, 0, 0, fill='lime', width=2, tags="path"), (x1, y1, x2, y2))
+        text = f"Percorso: {' -> '.join(map(str, path))} | Distanza totale: {route.distance}"
+        if route.status != ROUTE_OK:
+            text += f" | ⚠️ {route.status}"
+        self.label.config(text=text)
 
     def clear_paths(self, event=None):
+        for item in self.canvas.find_withtag("path"):
+            del self.overlay[item]
         self.canvas.delete("path")
         self.label.config(text="Percorso cancellato. Seleziona due punti.")
         self.selected.clear()
@@ -244,12 +319,52 @@ class MapApp:
         output_img.save(output_path, format="BMP")
         print(f"Immagine salvata come {output_path}")
 
+# === Batch validation ===
+def validate_matrix(nav_vec_path=NAV_VEC_PATH, matrix_path=MATRIX_PATH, tolerance=1, json_path=None):
+    """Controlla tutti gli N×(N-1) percorsi di matrix_int.dat senza GUI. Ritorna 0 se sono tutti validi."""
+    num_points = len(read_points(nav_vec_path))
+    start = time.perf_counter()
+    with load_matrix(matrix_path, num_points) as matrix:
+        report = validate_routes(matrix, tolerance=tolerance)
+    elapsed = time.perf_counter() - start
+
+    bad = report.pairs - report.counts[ROUTE_OK]
+    print(f"🧭 {report.pairs} percorsi controllati in {elapsed:.2f} s "
+          f"(max {report.max_hops} passi, errore max {report.max_error} unità 16.16)")
+    for status, count in report.counts.items():
+        if status != ROUTE_OK and count:
+            examples = ", ".join(f"{a}→{b}" for a, b in report.examples[status][:5])
+            print(f"   ❌ {status}: {count}  es. {examples}")
+    print("✅ Tutti i percorsi sono validi" if not bad else f"⚠️ {bad} percorsi non validi")
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report._asdict(), f, indent=2)
+    return 1 if bad else 0
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Visualizza i percorsi di matrix_int.dat sulla mappa")
+    parser.add_argument("--validate", action="store_true",
+                        help="senza GUI: controlla tutti i percorsi (loop, vicoli ciechi, distanze) ed esce")
+    parser.add_argument("--nav-vec", default=NAV_VEC_PATH, help="nav_vec.dat")
+    parser.add_argument("--matrix", default=MATRIX_PATH, help="matrix_int.dat")
+    parser.add_argument("--nav-matrix", default=NAV_MATRIX_PATH,
+                        help="nav_matrix.dat: dimensioni della griglia dei punti e layer di collisione")
+    parser.add_argument("--tolerance", type=int, default=1,
+                        help="scarto ammesso per passo tra somma delle distanze e distanza salvata (unità 16.16)")
+    parser.add_argument("--json", help="salva il report di --validate in questo file JSON")
+    return parser.parse_args(argv)
+
 # === Main ===
 if __name__ == '__main__':
-    points = load_points(NAV_VEC_PATH)
-    matrix = load_matrix(MATRIX_PATH, len(points))
+    args = parse_args(sys.argv[1:])
+    if args.validate:
+        sys.exit(validate_matrix(args.nav_vec, args.matrix, args.tolerance, args.json))
+
+    points = load_points(args.nav_vec, grid_size(args.nav_matrix))
+    matrix = load_matrix(args.matrix, len(points))
 
     root = tk.Tk()
     root.title("Percorso su mappa (1080x720)")
-    app = MapApp(root, MAP_PATH, points, matrix)
+    app = MapApp(root, MAP_PATH, points, matrix, args.nav_matrix)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,146 @@
+import math
+import mmap
+import os
+
+import numpy as np
+
+# One matrix_int.dat entry: uint32 fixed-point distance (16.16) + uint16 next node, packed to 6 bytes
+MATRIX_DTYPE = np.dtype([("dist", "<u4"), ("next_node", "<u2")])
+ENTRY_SIZE = MATRIX_DTYPE.itemsize
+FIXED_POINT_SCALE = 65536
+
+# Format limits: next_node (and the nav_vec.dat count) are uint16, distances are 16.16 fixed point in a uint32
+MAX_POINTS = 0xFFFF
+MAX_DISTANCE = 0xFFFFFFFF / FIXED_POINT_SCALE
+
+
+def check_point_count(num_points):
+    """Raise before any work is done when the node count cannot be stored."""
+    if num_points > MAX_POINTS:
+        raise ValueError(f"{num_points} points exceed the uint16 limit of {MAX_POINTS} for nav_vec/matrix_int")
+
+
+def points_from_size(size):
+    """Number of nodes of a matrix_int.dat of the given byte size (the file has no header)."""
+    entries, remainder = divmod(size, ENTRY_SIZE)
+    n = math.isqrt(entries)
+    if remainder or n * n != entries:
+        raise ValueError(f"{size} bytes is not an N×N matrix of {ENTRY_SIZE}-byte entries")
+    return n
+
+
+class MatrixInt:
+    """Zero-copy, memory-mapped view of matrix_int.dat.
+
+    The file is only mapped on first access. matrix[i] is a structured row (fields "dist" and
+    "next_node"), matrix[i][j] unpacks as (dist, next_node), entry(i, j) returns plain ints.
+    Use as a context manager (or call close()) so the file can be rewritten afterwards.
+    """
+
+    def __init__(self, path, num_points=None):
+        self.path = path
+        self.expected_points = num_points
+        self._file = None
+        self._mmap = None
+        self._records = None
+
+    @property
+    def records(self):
+        """The whole matrix as an (N, N) structured array backed by the file."""
+        if self._records is None:
+            self._open()
+        return self._records
+
+    def _open(self):
+        size = os.path.getsize(self.path)
+        n = points_from_size(size)
+        if self.expected_points is not None and n != self.expected_points:
+            raise ValueError(f"{self.path} holds {n}×{n} entries, expected {self.expected_points}")
+        if n == 0:
+            self._records = np.zeros((0, 0), dtype=MATRIX_DTYPE)
+            return
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._records = np.frombuffer(self._mmap, dtype=MATRIX_DTYPE).reshape(n, n)
+
+    def close(self):
+        self._records = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # rows handed out still use it; it is unmapped when the last one is released
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, i):
+        return self.records[i]
+
+    def entry(self, i, j):
+        """(distance, next_node) for the pair i → j as Python ints."""
+        record = self.records[i, j]
+        return int(record["dist"]), int(record["next_node"])
+
+    def row(self, i):
+        """(distances, next_nodes) arrays for every target from source i, without copying."""
+        row = self.records[i]
+        return row["dist"], row["next_node"]
+
+
+class MatrixWriter:
+    """Streams matrix_int.dat to disk one source row at a time, in any order, with O(N) memory.
+
+    Rows go to "<path>.part", sized up front so rows coming back from a process pool out of
+    order need no buffering. Leaving the with-block normally renames it over path in one step;
+    an exception (including a cancelled run) deletes it, so path is never left half-written.
+    """
+
+    def __init__(self, path, num_points):
+        check_point_count(num_points)
+        self.path = path
+        self.temp_path = path + ".part"
+        self.num_points = num_points
+        self.row_size = num_points * ENTRY_SIZE
+        self._file = open(self.temp_path, "wb")
+        self._file.truncate(num_points * self.row_size)
+
+    def write_row(self, source, row):
+        """Write one (N,) MATRIX_DTYPE row for the given source node."""
+        row = np.asarray(row)
+        if row.shape != (self.num_points,):
+            raise ValueError(f"Row {source} has {row.shape} entries, expected {self.num_points}")
+        self.write_rows(source, row[np.newaxis])
+
+    def write_rows(self, first_source, rows):
+        """Write a (k, N) MATRIX_DTYPE block holding the rows first_source .. first_source + k - 1."""
+        rows = np.ascontiguousarray(rows, dtype=MATRIX_DTYPE)
+        if rows.ndim != 2 or rows.shape[1] != self.num_points or first_source + len(rows) > self.num_points:
+            raise ValueError(f"Rows {first_source}+{rows.shape} do not fit a {self.num_points}-node matrix")
+        self._file.seek(first_source * self.row_size)
+        self._file.write(rows.data)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        if exc_type is None:
+            os.replace(self.temp_path, self.path)
+        elif os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+CACHE_DIR_NAME = os.path.join("p3_navtools", "nav_cache")
+DEFAULT_MAX_BYTES = 1 << 30
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # seconds
+# Bump when the generators change output for the same inputs, so stale entries stop matching
+CACHE_VERSION = 1
+
+
+def default_cache_dir():
+    """Per-user cache directory: %LOCALAPPDATA% on Windows, $XDG_CACHE_HOME or ~/.cache elsewhere."""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~", "AppData", "Local"))
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+    return os.path.join(base, CACHE_DIR_NAME)
+
+
+def cache_key(nav_matrix, points, **params):
+    """Hex digest of the nav_matrix.dat bytes, the point list and the generator parameters."""
+    digest = hashlib.sha256()
+    digest.update(f"nav-cache-v{CACHE_VERSION}".encode())
+    nav_matrix = memoryview(nav_matrix).cast("B")
+    digest.update(len(nav_matrix).to_bytes(8, "little"))
+    digest.update(nav_matrix)
+    points = np.asarray(points, dtype="<u2").reshape(-1, 2)
+    digest.update(len(points).to_bytes(8, "little"))
+    digest.update(points.tobytes())
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class NavCache:
+    """Content-addressed store for generated artifacts (nav_vec.dat, matrix_int.dat, map image).
+
+    Each key gets a directory holding its artifacts by name. A fetch only succeeds when every
+    requested artifact is there. Entries untouched for max_age seconds are evicted, then the
+    least recently used ones until the cache fits in max_bytes. The directory defaults to
+    default_cache_dir(), so runs from different working directories share it.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def fetch(self, key, targets):
+        """Copy cached artifacts to their targets ({name: path}). False, copying nothing, on a miss."""
+        entry = self._entry(key)
+        sources = {name: os.path.join(entry, name) for name in targets}
+        if not all(os.path.isfile(source) for source in sources.values()):
+            return False
+        for name, path in targets.items():
+            _copy_atomic(sources[name], path)
+        os.utime(entry)  # mark as recently used
+        return True
+
+    def store(self, key, name, path):
+        """Add the file at path to the entry for key under name, then evict."""
+        entry = self._entry(key)
+        os.makedirs(entry, exist_ok=True)
+        _copy_atomic(path, os.path.join(entry, name))
+        os.utime(entry)
+        self.evict(keep=key)
+
+    def evict(self, keep=None):
+        """Drop expired entries, then least recently used ones while over max_bytes (never keep)."""
+        if not os.path.isdir(self.directory):
+            return
+        now = time.time()
+        entries = []
+        for key in os.listdir(self.directory):
+            entry = self._entry(key)
+            if not os.path.isdir(entry):
+                continue
+            used = os.path.getmtime(entry)
+            if key != keep and now - used > self.max_age:
+                shutil.rmtree(entry, ignore_errors=True)
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(entry) if f.is_file())
+            entries.append((used, key, size))
+
+        total = sum(size for _, _, size in entries)
+        for used, key, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+            total -= size
+
+
+def _copy_atomic(source, target):
+    temp = target + ".part"
+    shutil.copyfile(source, temp)
+    os.replace(temp, target)
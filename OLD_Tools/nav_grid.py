@@ -0,0 +1,82 @@
+import mmap
+import struct
+
+import numpy as np
+
+HEADER = struct.Struct("<HH")  # width, height
+WATER = 0
+
+
+def read_size(path):
+    """(width, height) from the nav_matrix.dat header, without reading the cells."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path}: too small to hold the width/height header")
+    return HEADER.unpack(header)
+
+
+class NavGrid:
+    """nav_matrix.dat cells as a compact (height, width) uint8 array: 0 = water (walkable), else land.
+
+    Built from bytes, a memoryview or an ndarray, or mapped straight from a file with open().
+    is_walkable() answers one query without allocating. walkable() answers arrays of queries
+    in one vectorized pass.
+    """
+
+    def __init__(self, cells, width, height):
+        cells = np.frombuffer(cells, dtype=np.uint8) if not isinstance(cells, np.ndarray) else cells
+        if cells.size != width * height:
+            raise ValueError(f"{cells.size} cells for a {width}x{height} grid")
+        self.width = width
+        self.height = height
+        self.cells = cells.reshape(height, width)
+        # Flat byte view: indexing it yields plain ints, much cheaper than numpy scalar indexing
+        self._flat = memoryview(np.ascontiguousarray(self.cells).reshape(-1))
+
+    @classmethod
+    def open(cls, path, use_mmap=True):
+        """Load nav_matrix.dat, taking the dimensions from its <HH header.
+
+        With use_mmap the cells are mapped read-only rather than copied; the mapping lives as
+        long as the grid (or any array taken from it).
+        """
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"{path}: too small to hold the width/height header")
+            width, height = HEADER.unpack(header)
+            f.seek(0)
+            if use_mmap and width * height:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = f.read()
+        cells = np.frombuffer(data, dtype=np.uint8, offset=HEADER.size)
+        if cells.size != width * height:
+            raise ValueError(f"{path}: {cells.size} cells for a {width}x{height} header")
+        return cls(cells, width, height)
+
+    @classmethod
+    def empty(cls, width, height):
+        """All-water grid, used when there is no nav_matrix.dat yet."""
+        return cls(np.zeros(width * height, dtype=np.uint8), width, height)
+
+    def __len__(self):
+        return self.width * self.height
+
+    def to_bytes(self):
+        """The grid in nav_matrix.dat layout (header + cells)."""
+        return HEADER.pack(self.width, self.height) + self.cells.tobytes()
+
+    def is_walkable(self, x, y):
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
+            return False
+        return self._flat[y * self.width + x] == WATER
+
+    def walkable(self, xs, ys):
+        """Vectorized is_walkable over arrays of coordinates (out of bounds → False)."""
+        xs, ys = np.broadcast_arrays(np.asarray(xs, dtype=np.int64), np.asarray(ys, dtype=np.int64))
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        result = np.zeros(xs.shape, dtype=bool)
+        result[inside] = self.cells[ys[inside], xs[inside]] == WATER
+        return result
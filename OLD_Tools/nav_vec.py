@@ -0,0 +1,47 @@
+import numpy as np
+
+from matrix_int import check_point_count
+
+# nav_vec.dat: uint16 point count + 2 zero padding bytes, then one uint16 (x, y) pair per point.
+# Read as a uint32 the header holds the same value, so readers expecting "<I" agree up to MAX_POINTS.
+HEADER_DTYPE = np.dtype([("count", "<u2"), ("padding", "<u2")])
+POINT_DTYPE = np.dtype("<u2")
+HEADER_SIZE = HEADER_DTYPE.itemsize
+MAX_COORDINATE = 0xFFFF
+
+
+def decode_points(data, source="nav_vec.dat"):
+    """(N, 2) uint16 array of (x, y) points from nav_vec.dat bytes, after checking header and length."""
+    if len(data) < HEADER_SIZE:
+        raise ValueError(f"{source}: {len(data)} bytes, too short for the nav_vec.dat header")
+    header = np.frombuffer(data, dtype=HEADER_DTYPE, count=1)[0]
+    count, padding = int(header["count"]), int(header["padding"])
+    if padding != 0:
+        raise ValueError(f"{source}: unexpected nav_vec.dat header (padding = {padding})")
+    expected = HEADER_SIZE + count * 2 * POINT_DTYPE.itemsize
+    if len(data) != expected:
+        raise ValueError(f"{source}: {len(data)} bytes for {count} points, expected {expected}")
+    return np.frombuffer(data, dtype=POINT_DTYPE, offset=HEADER_SIZE).reshape(count, 2)
+
+
+def encode_points(points):
+    """nav_vec.dat bytes for a sequence (or (N, 2) array) of integer (x, y) points."""
+    coords = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    check_point_count(len(coords))
+    if coords.size and (coords.min() < 0 or coords.max() > MAX_COORDINATE):
+        raise ValueError(f"Point coordinates must be within 0..{MAX_COORDINATE} for nav_vec.dat")
+    header = np.array([(len(coords), 0)], dtype=HEADER_DTYPE)
+    return header.tobytes() + coords.astype(POINT_DTYPE).tobytes()
+
+
+def read_points(path):
+    """Points of a nav_vec.dat file as an (N, 2) uint16 array."""
+    with open(path, "rb") as f:
+        return decode_points(f.read(), path)
+
+
+def write_points(path, points):
+    """Write points in the nav_vec.dat layout; nothing is written when they cannot be stored."""
+    data = encode_points(points)
+    with open(path, "wb") as f:
+        f.write(data)
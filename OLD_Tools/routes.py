@@ -0,0 +1,255 @@
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+ROUTE_OK = "ok"
+ROUTE_NO_PATH = "no_path"  # matrix[a][b] has distance 0 for a != b (written as (0, 0)): no connection
+ROUTE_LOOP = "loop"        # next_node links revisit a node before reaching the target
+ROUTE_DEAD_END = "dead_end"            # the walk reaches a node with no route to the target (dist 0)
+ROUTE_BAD_NODE = "bad_next_node"       # next_node outside the matrix
+ROUTE_MISMATCH = "distance_mismatch"   # summed hop distances disagree with the stored distance
+
+# validate_routes status codes, in the order of ROUTE_STATUSES
+ROUTE_STATUSES = (ROUTE_OK, ROUTE_NO_PATH, ROUTE_LOOP, ROUTE_DEAD_END, ROUTE_BAD_NODE, ROUTE_MISMATCH)
+_OK, _NO_PATH, _LOOP, _DEAD_END, _BAD_NODE, _MISMATCH = range(len(ROUTE_STATUSES))
+VALIDATE_BLOCK_PAIRS = 1 << 20  # pairs walked together (targets per block = this // N)
+
+# pairs: routes checked (start != end)
+# counts: {status: number of routes}
+# examples: {status: up to max_examples (start, end) pairs} for every status but ROUTE_OK
+# max_hops: longest valid route, in hops
+# max_error: largest |summed hop distances - stored distance| of a valid route (fixed point)
+RouteReport = namedtuple("RouteReport", ["pairs", "counts", "examples", "max_hops", "max_error"])
+
+# nodes: tuple of node indices from start to where the walk stopped
+# distance: stored matrix distance start → end (fixed point, 0 when there is no route)
+Route = namedtuple("Route", ["nodes", "distance", "status"])
+
+
+class RouteService:
+    """Reconstructs routes from the next_node links of a matrix_int table, with an LRU cache.
+
+    Accepts a MatrixInt or an (N, N) array with "dist"/"next_node" fields. Nothing is printed
+    while walking; inspect Route.status instead.
+    """
+
+    def __init__(self, matrix, cache_size=4096):
+        records = getattr(matrix, "records", matrix)
+        self.dist = records["dist"]
+        self.next_node = records["next_node"]
+        self.num_points = len(records)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def route(self, start, end):
+        """Route from start to end, served from the cache when recently requested."""
+        key = (start, end)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        route = self._walk(start, end)
+        self._remember(key, route)
+        return route
+
+    def routes(self, pairs):
+        """Routes for many (start, end) pairs; cache misses are walked together, one hop per step."""
+        results = [self._cache.get(tuple(pair)) for pair in pairs]
+        missing = [i for i, route in enumerate(results) if route is None]
+        if missing:
+            starts = np.array([pairs[i][0] for i in missing], dtype=np.int64)
+            ends = np.array([pairs[i][1] for i in missing], dtype=np.int64)
+            for i, route in zip(missing, self._walk_many(starts, ends)):
+                results[i] = route
+                self._remember(tuple(pairs[i]), route)
+        return results
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def _remember(self, key, route):
+        self._cache[key] = route
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _walk(self, start, end):
+        if not (0 <= start < self.num_points and 0 <= end < self.num_points):
+            raise IndexError(f"Route {start} → {end} outside a {self.num_points}-node matrix")
+        dist_col = self.dist[:, end]
+        next_col = self.next_node[:, end]
+        # Unreachable pairs are stored as (0, 0): following next_node would wander off through node 0
+        if start != end and int(dist_col[start]) == 0:
+            return Route((start,), 0, ROUTE_NO_PATH)
+        nodes = [start]
+        current = start
+        # A simple path has at most N - 1 hops; anything longer is a loop
+        for _ in range(self.num_points):
+            if current == end:
+                return Route(tuple(nodes), int(dist_col[start]), ROUTE_OK)
+            next_node = int(next_col[current])
+            status = str(_stop_status(current, next_node, int(dist_col[current]), self.num_points))
+            if status:
+                return Route(tuple(nodes), int(dist_col[start]), status)
+            nodes.append(next_node)
+            current = next_node
+        if current == end:
+            return Route(tuple(nodes), int(dist_col[start]), ROUTE_OK)
+        return Route(_until_repeat(nodes), int(dist_col[start]), ROUTE_LOOP)
+
+    def _walk_many(self, starts, ends):
+        n = self.num_points
+        if len(starts) and (starts.min() < 0 or ends.min() < 0 or max(starts.max(), ends.max()) >= n):
+            raise IndexError(f"Route outside a {n}-node matrix")
+        count = len(starts)
+        current = starts.copy()
+        status = np.full(count, ROUTE_OK, dtype=object)
+        active = current != ends
+        # Unreachable pairs are stored as (0, 0): report them without walking, like _walk
+        unreachable = active & (self.dist[starts, ends] == 0)
+        status[unreachable] = ROUTE_NO_PATH
+        active &= ~unreachable
+        hop_pairs = []
+        hop_nodes = []
+
+        for _ in range(n):
+            idx = np.flatnonzero(active)
+            if not idx.size:
+                break
+            here = current[idx]
+            nxt = self.next_node[here, ends[idx]].astype(np.int64)
+            stop = _stop_status(here, nxt, self.dist[here, ends[idx]], n)
+            stuck = stop != ""
+            if stuck.any():
+                status[idx[stuck]] = stop[stuck].tolist()
+                active[idx[stuck]] = False
+            moving = idx[~stuck]
+            current[moving] = nxt[~stuck]
+            hop_pairs.append(moving)
+            hop_nodes.append(current[moving])
+            active[moving] = current[moving] != ends[moving]
+        status[active] = ROUTE_LOOP
+
+        # Group the recorded hops per pair, keeping step order
+        if hop_pairs:
+            pair_of_hop = np.concatenate(hop_pairs)
+            node_of_hop = np.concatenate(hop_nodes)
+        else:
+            pair_of_hop = node_of_hop = np.empty(0, dtype=np.int64)
+        order = np.argsort(pair_of_hop, kind="stable")
+        bounds = np.searchsorted(pair_of_hop[order], np.arange(count + 1))
+        node_of_hop = node_of_hop[order].tolist()
+        totals = self.dist[starts, ends].tolist()
+
+        routes = []
+        for i, start in enumerate(starts.tolist()):
+            nodes = [start] + node_of_hop[bounds[i]:bounds[i + 1]]
+            if status[i] == ROUTE_LOOP:
+                nodes = _until_repeat(nodes)
+            routes.append(Route(tuple(nodes), int(totals[i]), status[i]))
+        return routes
+
+
+def _stop_status(here, next_node, dist, num_points):
+    """Why a walk toward a target stops at node here ("" when it takes the hop to next_node).
+
+    Same precedence as validate_routes: a bad next_node, then a dead end (no route from here),
+    then a node pointing at itself. Works on scalars and on arrays.
+    """
+    return np.select(
+        [np.asarray(next_node) >= num_points, np.asarray(dist) == 0, np.asarray(next_node) == here],
+        [ROUTE_BAD_NODE, ROUTE_DEAD_END, ROUTE_LOOP],
+        "",
+    )
+
+
+def _until_repeat(nodes):
+    """Prefix of nodes up to (excluding) the first revisited node."""
+    seen = set()
+    for i, node in enumerate(nodes):
+        if node in seen:
+            return tuple(nodes[:i])
+        seen.add(node)
+    return tuple(nodes)
+
+
+def validate_routes(matrix, tolerance=1, max_examples=10, progress=None):
+    """Check every (start, end) route of a matrix_int table at once and classify it.
+
+    Works on blocks of target columns with pointer doubling: after step k every node knows
+    where it is 2**k hops later, with the summed hop distances, so all routes are resolved in
+    about log2(longest route) passes. Nodes that stop a walk (the target, dead ends, bad or
+    self next_node) point to themselves; a route that ends anywhere else never settles and is
+    a loop. A route is a ROUTE_MISMATCH when the summed hop distances differ from the stored
+    start → end distance by more than tolerance fixed-point units per hop (each stored value
+    is rounded by up to half a unit). Returns a RouteReport.
+    """
+    records = getattr(matrix, "records", matrix)
+    n = len(records)
+    dist = records["dist"]
+    next_node = records["next_node"]
+    counts = np.zeros(len(ROUTE_STATUSES), dtype=np.int64)
+    examples = {status: [] for status in ROUTE_STATUSES[1:]}
+    max_hops = 0
+    max_error = 0
+    block = max(1, VALIDATE_BLOCK_PAIRS // max(n, 1))
+    nodes = np.arange(n)[:, None]
+    passes = max(1, n - 1).bit_length()  # 2**passes hops cover any simple route
+
+    for first in range(0, n, block):
+        cols = np.arange(first, min(n, first + block))
+        col = np.arange(len(cols))[None, :]
+        # Routes toward the block's targets only need these columns, copied out of the mapping once
+        nxt = next_node[:, cols].astype(np.int64)
+        expected = dist[:, cols].astype(np.int64)
+        is_target = nodes == cols[None, :]
+
+        # Where a walk stops at a node instead of taking another hop
+        stop_status = np.full(nxt.shape, _OK, dtype=np.uint8)
+        stop_status[nxt == nodes] = _LOOP
+        stop_status[expected == 0] = _DEAD_END
+        stop_status[nxt >= n] = _BAD_NODE
+        stop_status[is_target] = _OK
+        stop = is_target | (stop_status != _OK)
+
+        jump = np.where(stop, nodes, nxt)
+        total = np.where(stop, 0, dist[nodes, jump].astype(np.int64))
+        hops = (~stop).astype(np.int64)
+        for _ in range(passes):
+            ahead = jump[jump, col]
+            if np.array_equal(ahead, jump):
+                break
+            total += total[jump, col]
+            hops += hops[jump, col]
+            jump = ahead
+
+        end = jump
+        status = np.where(end == cols[None, :], _OK, stop_status[end, col])
+        status[(status == _OK) & (end != cols[None, :])] = _LOOP
+        status[(expected == 0) & ~is_target] = _NO_PATH
+        error = np.abs(total - expected)
+        reached = status == _OK
+        status[reached & (error > tolerance * hops)] = _MISMATCH
+        ok = status == _OK
+        ok &= ~is_target
+        if ok.any():
+            max_hops = max(max_hops, int(hops[ok].max()))
+            max_error = max(max_error, int(error[ok].max()))
+
+        # Only routes between different nodes are counted
+        status[is_target] = len(ROUTE_STATUSES)
+        counts += np.bincount(status.reshape(-1), minlength=len(ROUTE_STATUSES) + 1)[:len(ROUTE_STATUSES)]
+        for code, name in enumerate(ROUTE_STATUSES[1:], start=1):
+            room = max_examples - len(examples[name])
+            if room > 0:
+                starts, targets = np.nonzero(status == code)
+                examples[name].extend(zip(starts[:room].tolist(), cols[targets[:room]].tolist()))
+        if progress is not None:
+            progress(int(cols[-1]) + 1, n)
+
+    return RouteReport(
+        pairs=n * (n - 1),
+        counts={name: int(count) for name, count in zip(ROUTE_STATUSES, counts)},
+        examples=examples,
+        max_hops=max_hops,
+        max_error=max_error,
+    )
@@ -0,0 +1,339 @@
+import heapq
+import math
+import os
+from multiprocessing import Pool
+
+import numpy as np
+
+from matrix_int import MATRIX_DTYPE, FIXED_POINT_SCALE, MAX_DISTANCE, MatrixWriter, check_point_count
+from visibility import visible_pairs, build_adjacency, prune_pairs
+
+# Below this many Dijkstra runs the process pool start-up costs more than it saves
+PARALLEL_MIN_POINTS = 256
+LARGE_DISTANCE = 100000.0
+# Relative slack when deciding whether a stored shortest path runs through a node
+PATH_TOLERANCE = 1e-9
+# Sources sampled when reporting how far pruning moved the shortest paths
+DEVIATION_SAMPLES = 16
+
+_worker_adj = None
+
+
+class GenerationCancelled(Exception):
+    """Raised from a routing computation whose cancel event was set."""
+
+
+def shortest_paths(adj, source):
+    """Heap Dijkstra from source. Returns (dist, first_hop) lists; first_hop[v] is -1 when unreachable.
+
+    The first hop is propagated while relaxing, so no prev[] back-walk is needed per target.
+    """
+    n = len(adj)
+    dist = [math.inf] * n
+    first = [-1] * n
+    dist[source] = 0.0
+    first[source] = source
+    heap = [(0.0, source)]
+    while heap:
+        current_dist, u = heapq.heappop(heap)
+        if current_dist > dist[u]:
+            continue
+        hop = first[u]
+        for v, weight in adj[u]:
+            candidate = current_dist + weight
+            if dist[v] > candidate:
+                dist[v] = candidate
+                first[v] = v if u == source else hop
+                heapq.heappush(heap, (candidate, v))
+    return dist, first
+
+
+def to_csr(adj):
+    """Flatten adjacency lists into (indptr, indices, weights) arrays, cheap to send to worker processes."""
+    counts = np.fromiter((len(edges) for edges in adj), dtype=np.int64, count=len(adj))
+    indptr = np.zeros(len(adj) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    indices = np.fromiter((j for edges in adj for j, _ in edges), dtype=np.int64, count=int(indptr[-1]))
+    weights = np.fromiter((w for edges in adj for _, w in edges), dtype=np.float64, count=int(indptr[-1]))
+    return indptr, indices, weights
+
+
+def from_csr(indptr, indices, weights):
+    indices = indices.tolist()
+    weights = weights.tolist()
+    bounds = indptr.tolist()
+    return [list(zip(indices[a:b], weights[a:b])) for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def _init_worker(indptr, indices, weights):
+    global _worker_adj
+    _worker_adj = from_csr(indptr, indices, weights)
+
+
+def _row_worker(source):
+    dist, first = shortest_paths(_worker_adj, source)
+    return source, np.array(dist, dtype=np.float64), np.array(first, dtype=np.int32)
+
+
+def _inline_rows(adj, sources):
+    for source in sources:
+        dist, first = shortest_paths(adj, source)
+        yield source, np.array(dist, dtype=np.float64), np.array(first, dtype=np.int32)
+
+
+def _tracked(rows, total, progress, cancel):
+    for done, row in enumerate(rows, 1):
+        if cancel is not None and cancel.is_set():
+            raise GenerationCancelled(f"Cancelled after {done - 1}/{total} rows")
+        yield row
+        if progress is not None:
+            progress(done, total)
+
+
+def shortest_path_rows(adj, sources, jobs=None, progress=None, cancel=None):
+    """Yield (source, dist array, first-hop array) for each source, over a process pool when worthwhile.
+
+    progress(done, total) is called once each row has been consumed. When the cancel event
+    (threading.Event or anything with is_set) is set, the next row raises GenerationCancelled
+    and the pool is terminated.
+    """
+    sources = list(sources)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(sources) < PARALLEL_MIN_POINTS:
+        yield from _tracked(_inline_rows(adj, sources), len(sources), progress, cancel)
+        return
+
+    chunksize = max(1, len(sources) // (jobs * 8))
+    with Pool(jobs, initializer=_init_worker, initargs=to_csr(adj)) as pool:
+        rows = pool.imap_unordered(_row_worker, sources, chunksize=chunksize)
+        yield from _tracked(rows, len(sources), progress, cancel)
+
+
+def all_pairs(adj, jobs=None, progress=None, cancel=None):
+    """All-pairs shortest paths: (N×N float64 distances, N×N int32 first hops, -1 when unreachable)."""
+    n = len(adj)
+    dist = np.full((n, n), np.inf)
+    first = np.full((n, n), -1, dtype=np.int32)
+    for source, row_dist, row_first in shortest_path_rows(adj, range(n), jobs, progress, cancel):
+        dist[source] = row_dist
+        first[source] = row_first
+    return dist, first
+
+
+def encode_rows(sources, dist, first):
+    """Pack routing rows as matrix_int.dat records (self → (0, i), unreachable → (0, 0))."""
+    sources = np.asarray(sources, dtype=np.int64)
+    dist = np.atleast_2d(dist)
+    first = np.atleast_2d(first)
+    rows = np.zeros(dist.shape, dtype=MATRIX_DTYPE)
+    reachable = first >= 0
+    reachable[np.arange(len(sources)), sources] = False
+
+    distances = dist[reachable]
+    if distances.size:
+        longest = distances.max()
+        if longest > MAX_DISTANCE:
+            raise OverflowError(f"Distance {longest:.2f} does not fit the 16.16 fixed-point field (max {MAX_DISTANCE:.2f})")
+        if longest > LARGE_DISTANCE:
+            print(f"Warning: {int((distances > LARGE_DISTANCE).sum())} large distances (max {longest:.7f})")
+    # np.rint rounds half to even, like round() on the original per-entry path
+    rows["dist"][reachable] = np.rint(distances * FIXED_POINT_SCALE).astype(np.uint32)
+    rows["next_node"][reachable] = first[reachable]
+    rows["next_node"][np.arange(len(sources)), sources] = sources
+    return rows
+
+
+def encode_matrix(dist, first):
+    """Pack the whole routing state as matrix_int.dat bytes."""
+    n = len(dist)
+    return encode_rows(np.arange(n), dist, first).reshape(-1).view(np.uint8)
+
+
+def path_deviation(full_adj, pruned_adj, sources):
+    """Relative shortest-path deviation of a pruned graph from sampled sources: (max, mean, lost routes)."""
+    deviations = []
+    lost = 0
+    for source in sources:
+        full, _ = shortest_paths(full_adj, source)
+        pruned, _ = shortest_paths(pruned_adj, source)
+        full = np.asarray(full)
+        pruned = np.asarray(pruned)
+        reachable = np.isfinite(full) & (full > 0)
+        lost += int((reachable & ~np.isfinite(pruned)).sum())
+        ok = reachable & np.isfinite(pruned)
+        deviations.append(pruned[ok] / full[ok] - 1.0)
+    deviations = np.concatenate(deviations) if deviations else np.empty(0)
+    if not deviations.size:
+        return 0.0, 0.0, lost
+    return float(deviations.max()), float(deviations.mean()), lost
+
+
+def build_graph(los, points, prune_tolerance=None, max_edge_length=None):
+    """Visibility adjacency for points, optionally pruned (see visibility.prune_pairs) with a deviation report."""
+    pairs = visible_pairs(los, points)
+    if prune_tolerance is None and max_edge_length is None:
+        return build_adjacency(points, pairs)
+
+    pruned, stats = prune_pairs(points, pairs, prune_tolerance or 0.0, max_edge_length)
+    adj = build_adjacency(points, pruned)
+    full = build_adjacency(points, pairs)
+    step = max(1, len(points) // DEVIATION_SAMPLES)
+    worst, mean, lost = path_deviation(full, adj, range(0, len(points), step))
+    print(f"Pruned visibility graph: {stats.edges_before} → {stats.edges_after} edges "
+          f"({stats.too_long} over max length); sampled distance deviation max {worst:.4%}, mean {mean:.4%}"
+          + (f", {lost} routes lost" if lost else ""))
+    return adj
+
+
+def generate_matrix(adj, jobs=None):
+    """All-pairs routing table for matrix_int.dat as one contiguous N*N*6 byte array."""
+    check_point_count(len(adj))
+    return encode_matrix(*all_pairs(adj, jobs))
+
+
+def write_matrix(path, adj, jobs=None, progress=None, cancel=None):
+    """Compute and stream matrix_int.dat row by row; memory stays O(N) besides the graph itself.
+
+    path is only replaced once every row is written (see MatrixWriter); progress and cancel
+    as in shortest_path_rows.
+    """
+    n = len(adj)
+    check_point_count(n)
+    with MatrixWriter(path, n) as writer:
+        for source, row_dist, row_first in shortest_path_rows(adj, range(n), jobs, progress, cancel):
+            writer.write_row(source, encode_rows([source], row_dist, row_first)[0])
+
+
+class IncrementalRouter:
+    """Keeps the visibility graph and all-pairs routing state so point edits only redo what they touch.
+
+    Adding a point relaxes every pair through the new node in one vectorized pass. Removing or moving
+    a point re-runs Dijkstra only for the sources whose stored shortest paths went through it.
+    Results can differ from a from-scratch run in the last fixed-point bit or in the choice between
+    equally short routes. With pruning, points added or moved later keep all their visible edges.
+    jobs only applies to the initial all-pairs run; edits are always routed in this process.
+    """
+
+    def __init__(self, los, points, jobs=None, prune_tolerance=None, max_edge_length=None,
+                 progress=None, cancel=None):
+        self.los = los
+        self.jobs = jobs
+        self.points = list(points)
+        check_point_count(len(self.points))
+        adj = build_graph(los, self.points, prune_tolerance, max_edge_length)
+        self.neighbors = [dict(edges) for edges in adj]
+        self.dist, self.first = all_pairs(adj, jobs, progress, cancel)
+
+    def adjacency(self):
+        return [sorted(nbrs.items()) for nbrs in self.neighbors]
+
+    def matrix(self):
+        return encode_matrix(self.dist, self.first)
+
+    def write(self, path, block=256):
+        """Write the current routing state to matrix_int.dat, encoding block rows at a time."""
+        n = len(self.points)
+        with MatrixWriter(path, n) as writer:
+            for start in range(0, n, block):
+                sources = np.arange(start, min(start + block, n))
+                writer.write_rows(start, encode_rows(sources, self.dist[sources], self.first[sources]))
+
+    def add_point(self, point):
+        """Append a point (same index as the editor list) and update the routing state."""
+        k = len(self.points)
+        self.points.append(tuple(point))
+        self.neighbors.append({})
+        self.dist = np.pad(self.dist, ((0, 1), (0, 1)), constant_values=np.inf)
+        self.first = np.pad(self.first, ((0, 1), (0, 1)), constant_values=-1)
+        self.dist[k, k] = 0.0
+        self.first[k, k] = k
+        self._attach(k)
+
+    def move_point(self, index, point):
+        self._detach(index)
+        self.points[index] = tuple(point)
+        self._attach(index)
+
+    def remove_point(self, index):
+        self._detach(index)
+        del self.points[index]
+        del self.neighbors[index]
+        self.neighbors = [{(j - 1 if j > index else j): w for j, w in nbrs.items()} for nbrs in self.neighbors]
+        self.dist = np.delete(np.delete(self.dist, index, axis=0), index, axis=1)
+        first = np.delete(np.delete(self.first, index, axis=0), index, axis=1)
+        first[first > index] -= 1
+        self.first = first
+
+    def _connect(self, k):
+        """Line-of-sight edges from point k to every other point."""
+        pts = np.asarray(self.points, dtype=np.int64).reshape(-1, 2)
+        others = np.flatnonzero(np.arange(len(pts)) != k)
+        x, y = pts[k]
+        ok = self.los.clear_segments(np.full(others.size, x), np.full(others.size, y), pts[others, 0], pts[others, 1])
+        others = others[ok]
+        delta = pts[others] - pts[k]
+        weights = np.sqrt((delta * delta).sum(axis=1).astype(np.float64))
+        for j, w in zip(others.tolist(), weights.tolist()):
+            self.neighbors[k][j] = w
+            self.neighbors[j][k] = w
+
+    def _attach(self, k):
+        """Add point k's edges and relax all pairs through it (k is currently isolated)."""
+        self._connect(k)
+        if not self.neighbors[k]:
+            return
+        n = len(self.points)
+        dist = self.dist
+        first = self.first
+        nbrs = np.fromiter(self.neighbors[k].keys(), dtype=np.int64)
+        weights = np.fromiter(self.neighbors[k].values(), dtype=np.float64)
+        cols = np.arange(n)
+
+        # k → t leaves through the best neighbour u
+        via = weights[:, None] + dist[nbrs, :]
+        best = np.argmin(via, axis=0)
+        dist[k, :] = via[best, cols]
+        first[k, :] = np.where(np.isfinite(dist[k, :]), nbrs[best], -1)
+
+        # s → k arrives through the best neighbour u; the first hop is s's first hop towards u
+        via = dist[:, nbrs] + weights[None, :]
+        best = np.argmin(via, axis=1)
+        dist[:, k] = via[cols, best]
+        hop = np.where(cols == nbrs[best], k, first[cols, nbrs[best]])
+        first[:, k] = np.where(np.isfinite(dist[:, k]), hop, -1)
+        dist[k, k] = 0.0
+        first[k, k] = k
+
+        # Every other pair may now be shorter through k
+        via = dist[:, k][:, None] + dist[k, :][None, :]
+        better = via < dist
+        dist[better] = via[better]
+        first[:] = np.where(better, first[:, k][:, None], first)
+
+    def _detach(self, k):
+        """Drop point k's edges and re-run Dijkstra for every source whose routes went through it."""
+        dist = self.dist
+        through = dist[:, k][:, None] + dist[k, :][None, :] <= dist * (1 + PATH_TOLERANCE)
+        through &= np.isfinite(dist)
+        through[:, k] = False
+        through[k, :] = False
+        np.fill_diagonal(through, False)
+        affected = np.flatnonzero(through.any(axis=1))
+
+        for j in self.neighbors[k]:
+            del self.neighbors[j][k]
+        self.neighbors[k] = {}
+        dist[k, :] = np.inf
+        dist[:, k] = np.inf
+        dist[k, k] = 0.0
+        self.first[k, :] = -1
+        self.first[:, k] = -1
+        self.first[k, k] = k
+
+        if affected.size:
+            adj = self.adjacency()
+            # Edits run in the editor's mouse handlers: a process pool would cost more to start (and
+            # freeze the UI longer) than the few hundred Dijkstra runs it would share out
+            for source, row_dist, row_first in shortest_path_rows(adj, affected.tolist(), jobs=1):
+                dist[source] = row_dist
+                self.first[source] = row_first
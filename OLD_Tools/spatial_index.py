@@ -0,0 +1,128 @@
+import math
+
+
+class PointGrid:
+    """Uniform-grid spatial index over a list of (x, y) points, addressed by list position.
+
+    Inserting, moving and hit-testing only touch the few cells around a point. Removing a point
+    renumbers the ones after it to mirror `del points[i]`, which costs O(N) but happens once per click.
+    """
+
+    def __init__(self, points=(), cell_size=8):
+        self.cell_size = cell_size
+        self.rebuild(points)
+
+    def rebuild(self, points):
+        self.positions = []
+        self.cells = {}
+        self.extent = None  # (min cx, min cy, max cx, max cy) of every cell ever used
+        for point in points:
+            self.insert(point)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, point):
+        """Append a point (index = current length) and return its index."""
+        index = len(self.positions)
+        self.positions.append(tuple(point))
+        self._add(self._cell(*point), index)
+        return index
+
+    def move(self, index, point):
+        old = self._cell(*self.positions[index])
+        new = self._cell(*point)
+        self.positions[index] = tuple(point)
+        if old != new:
+            self._discard(old, index)
+            self._add(new, index)
+
+    def remove(self, index):
+        del self.positions[index]
+        self.rebuild(self.positions)
+
+    def _add(self, cell, index):
+        self.cells.setdefault(cell, []).append(index)
+        cx, cy = cell
+        if self.extent is None:
+            self.extent = (cx, cy, cx, cy)
+        else:
+            x0, y0, x1, y1 = self.extent
+            self.extent = (min(x0, cx), min(y0, cy), max(x1, cx), max(y1, cy))
+
+    def _discard(self, cell, index):
+        bucket = self.cells[cell]
+        bucket.remove(index)
+        if not bucket:
+            del self.cells[cell]
+
+    def _candidates(self, x, y, radius):
+        cx0, cy0 = self._cell(x - radius, y - radius)
+        cx1, cy1 = self._cell(x + radius, y + radius)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                yield from self.cells.get((cx, cy), ())
+
+    def within(self, x, y, radius):
+        """Indices of the points within Euclidean distance radius of (x, y), in index order."""
+        r2 = radius * radius
+        found = []
+        for i in self._candidates(x, y, radius):
+            px, py = self.positions[i]
+            if (px - x) ** 2 + (py - y) ** 2 <= r2:
+                found.append(i)
+        return sorted(found)
+
+    def hit(self, x, y, half_size, strict=False):
+        """Closest point inside the square |dx|, |dy| <= half_size (< with strict), or None."""
+        best = None
+        best_key = None
+        for i in self._candidates(x, y, half_size):
+            px, py = self.positions[i]
+            dx, dy = abs(px - x), abs(py - y)
+            inside = dx < half_size and dy < half_size if strict else dx <= half_size and dy <= half_size
+            if inside:
+                key = (dx * dx + dy * dy, i)
+                if best_key is None or key < best_key:
+                    best, best_key = i, key
+        return best
+
+    def nearest(self, x, y, max_dist=math.inf):
+        """Index of the point closest to (x, y) within max_dist, searching outward ring by ring."""
+        if not self.positions:
+            return None
+        best = None
+        best_key = (max_dist * max_dist, math.inf)
+        cx, cy = self._cell(x, y)
+        x0, y0, x1, y1 = self.extent
+        last_ring = max(cx - x0, x1 - cx, cy - y0, y1 - cy)
+        ring = 0
+        while ring <= last_ring:
+            # Nothing in this ring or beyond can beat the best found so far
+            ring_dist = max(0, ring - 1) * self.cell_size
+            if ring_dist * ring_dist > best_key[0]:
+                break
+            for cell in _ring_cells(cx, cy, ring):
+                for i in self.cells.get(cell, ()):
+                    px, py = self.positions[i]
+                    key = ((px - x) ** 2 + (py - y) ** 2, i)
+                    if key < best_key:
+                        best, best_key = i, key
+            ring += 1
+        return best
+
+
+def _ring_cells(cx, cy, ring):
+    """Cells at Chebyshev distance exactly ring from (cx, cy)."""
+    if ring == 0:
+        yield cx, cy
+        return
+    for gx in range(cx - ring, cx + ring + 1):
+        yield gx, cy - ring
+        yield gx, cy + ring
+    for gy in range(cy - ring + 1, cy + ring):
+        yield cx - ring, gy
+        yield cx + ring, gy
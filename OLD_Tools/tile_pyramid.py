@@ -0,0 +1,278 @@
+import math
+from collections import OrderedDict
+
+import tkinter as tk
+from PIL import Image, ImageTk
+
+TILE_SIZE = 256
+TILE_CACHE = 512        # tiles (PIL) kept per pyramid
+PHOTO_CACHE_PIXELS = 32 * 2**20   # screen pixels of scaled tiles kept per view (deep zoom tiles are big)
+ZOOM_STEP = 1.25
+MAX_PIXEL_ZOOM = 8      # deepest zoom: one image pixel spans this many screen pixels
+
+
+class TilePyramid:
+    """Mip levels of an image (level k = 1/2**k size), cut into TILE_SIZE tiles on demand.
+
+    Levels are built once with box reduction. Tiles are cropped lazily and kept in an LRU
+    cache, so panning around a zoomed-in area only ever touches the tiles in view.
+    """
+
+    def __init__(self, image, tile_size=TILE_SIZE, cache_size=TILE_CACHE):
+        self.tile_size = tile_size
+        self.cache_size = cache_size
+        self.width, self.height = image.size
+        self.levels = [image]
+        while max(self.levels[-1].size) > tile_size:
+            self.levels.append(self.levels[-1].reduce(2))
+        self._tiles = OrderedDict()
+
+    def level_for(self, pixel_scale):
+        """Coarsest level that still has at least one texel per screen pixel at this scale."""
+        if pixel_scale >= 1:
+            return 0
+        return min(len(self.levels) - 1, int(math.floor(math.log2(1 / pixel_scale))))
+
+    def tile_range(self, level, x0, y0, x1, y1):
+        """Tile indices (tx, ty) covering the full-resolution box [x0, x1) × [y0, y1)."""
+        span = self.tile_size << level
+        tx0, ty0 = max(0, int(x0 // span)), max(0, int(y0 // span))
+        tx1 = min(int(math.ceil(min(x1, self.width) / span)), -(-self.width // span))
+        ty1 = min(int(math.ceil(min(y1, self.height) / span)), -(-self.height // span))
+        return [(tx, ty) for ty in range(ty0, ty1) for tx in range(tx0, tx1)]
+
+    def tile_box(self, level, tx, ty):
+        """Full-resolution box (x0, y0, x1, y1) a tile covers; edge tiles are clipped to the image."""
+        span = self.tile_size << level
+        return (tx * span, ty * span, min((tx + 1) * span, self.width), min((ty + 1) * span, self.height))
+
+    def tile(self, level, tx, ty):
+        key = (level, tx, ty)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+        image = self.levels[level]
+        size = self.tile_size
+        box = (tx * size, ty * size, min((tx + 1) * size, image.width), min((ty + 1) * size, image.height))
+        tile = image.crop(box)
+        self._tiles[key] = tile
+        if len(self._tiles) > self.cache_size:
+            self._tiles.popitem(last=False)
+        return tile
+
+
+class BlendedPyramid:
+    """Two aligned pyramids shown blended at an adjustable opacity (alpha of the top one).
+
+    TiledView scales both tiles once and keeps them, so changing alpha only re-blends the scaled
+    tiles on screen and pastes them into their PhotoImages (see TiledView.refresh_blend).
+    """
+
+    def __init__(self, base, top, alpha=0.5):
+        self.base = base
+        self.top = top
+        self.alpha = alpha
+        self.width, self.height = base.width, base.height
+
+    def level_for(self, pixel_scale):
+        return self.base.level_for(pixel_scale)
+
+    def tile_range(self, level, x0, y0, x1, y1):
+        return self.base.tile_range(level, x0, y0, x1, y1)
+
+    def tile_box(self, level, tx, ty):
+        return self.base.tile_box(level, tx, ty)
+
+    def tiles(self, level, tx, ty):
+        return self.base.tile(level, tx, ty), self.top.tile(level, tx, ty)
+
+
+class _ScaledTile:
+    """A tile scaled for the screen: its PhotoImage and, for blended layers, the scaled inputs."""
+
+    __slots__ = ("photo", "layers", "alpha", "pixels")
+
+    def __init__(self, photo, layers, alpha, pixels):
+        self.photo = photo
+        self.layers = layers
+        self.alpha = alpha
+        self.pixels = pixels
+
+    def blend(self, alpha):
+        self.photo.paste(Image.blend(self.layers[0], self.layers[1], alpha))
+        self.alpha = alpha
+
+
+class TiledView:
+    """Pan/zoom renderer of one or more TilePyramid layers on a Tk canvas.
+
+    World coordinates are the canvas coordinates at zoom 1; base_scale maps image pixels to them
+    (x and y separately, so stretched layouts keep working). Only the visible tiles are scaled and
+    drawn, and renders requested in a burst of events are coalesced into one. on_change(view) is
+    called after every pan or zoom so overlay items can be moved with to_screen().
+    """
+
+    def __init__(self, canvas, layers, base_scale, view_size, on_change=None):
+        self.canvas = canvas
+        self.layers = layers            # {name: TilePyramid}, all with the same image size
+        self.layer = next(iter(layers))
+        self.base_x, self.base_y = base_scale
+        self.view_width, self.view_height = view_size
+        self.on_change = on_change
+        self.zoom = 1.0
+        self.offset_x = self.offset_y = 0.0
+        self.max_zoom = MAX_PIXEL_ZOOM / min(self.base_x, self.base_y)
+        self._photos = OrderedDict()
+        self._photo_pixels = 0
+        self._visible = []
+        self._render_job = None
+        self._drag = None
+
+    # --- coordinates ---
+    def to_screen(self, x, y):
+        return (x - self.offset_x) * self.zoom, (y - self.offset_y) * self.zoom
+
+    def to_world(self, x, y):
+        return x / self.zoom + self.offset_x, y / self.zoom + self.offset_y
+
+    # --- interaction ---
+    def bind(self):
+        """Wheel zooms around the cursor, middle-drag or arrow keys pan, Home resets."""
+        self.canvas.bind("<MouseWheel>", lambda e: self.zoom_at(e.x, e.y, ZOOM_STEP if e.delta > 0 else 1 / ZOOM_STEP))
+        self.canvas.bind("<Button-4>", lambda e: self.zoom_at(e.x, e.y, ZOOM_STEP))
+        self.canvas.bind("<Button-5>", lambda e: self.zoom_at(e.x, e.y, 1 / ZOOM_STEP))
+        self.canvas.bind("<ButtonPress-2>", self._start_drag)
+        self.canvas.bind("<B2-Motion>", self._drag_to)
+        root = self.canvas.winfo_toplevel()
+        step = 0.1
+        root.bind("<Left>", lambda e: self.pan(-self.view_width * step, 0))
+        root.bind("<Right>", lambda e: self.pan(self.view_width * step, 0))
+        root.bind("<Up>", lambda e: self.pan(0, -self.view_height * step))
+        root.bind("<Down>", lambda e: self.pan(0, self.view_height * step))
+        root.bind("<Home>", lambda e: self.reset())
+
+    def _start_drag(self, event):
+        self._drag = (event.x, event.y)
+
+    def _drag_to(self, event):
+        if self._drag is not None:
+            x, y = self._drag
+            self._drag = (event.x, event.y)
+            self.pan(x - event.x, y - event.y)
+
+    def zoom_at(self, sx, sy, factor):
+        """Zoom by factor keeping the world point under screen (sx, sy) in place."""
+        zoom = min(self.max_zoom, max(1.0, self.zoom * factor))
+        if zoom == self.zoom:
+            return
+        wx, wy = self.to_world(sx, sy)
+        self.zoom = zoom
+        self.offset_x = wx - sx / zoom
+        self.offset_y = wy - sy / zoom
+        self._changed()
+
+    def pan(self, dx, dy):
+        """Move the view by (dx, dy) screen pixels."""
+        self.offset_x += dx / self.zoom
+        self.offset_y += dy / self.zoom
+        self._changed()
+
+    def reset(self):
+        self.zoom = 1.0
+        self.offset_x = self.offset_y = 0.0
+        self._changed()
+
+    def set_layer(self, name):
+        self.layer = name
+        self.request_render()
+
+    def refresh_blend(self):
+        """Show a BlendedPyramid layer at its new alpha: visible tiles are re-blended in place."""
+        if not self._visible:
+            self.request_render()
+        alpha = getattr(self.layers[self.layer], "alpha", None)
+        for entry in self._visible:
+            if entry.layers is not None and entry.alpha != alpha:
+                entry.blend(alpha)
+
+    def _changed(self):
+        # Keep the view over the image
+        self.offset_x = min(max(0.0, self.offset_x), self.view_width - self.view_width / self.zoom)
+        self.offset_y = min(max(0.0, self.offset_y), self.view_height - self.view_height / self.zoom)
+        self.request_render()
+        if self.on_change is not None:
+            self.on_change(self)
+
+    # --- rendering ---
+    def request_render(self):
+        if self._render_job is None:
+            self._render_job = self.canvas.after_idle(self.render)
+
+    def clear(self):
+        """Take the tiles off the canvas and drop a pending render, while something else fills the view.
+
+        Scaled tiles stay cached; the next pan, zoom or request_render draws them again.
+        """
+        if self._render_job is not None:
+            self.canvas.after_cancel(self._render_job)
+            self._render_job = None
+        self.canvas.delete("tile")
+        self._visible = []
+
+    def render(self):
+        self._render_job = None
+        pyramid = self.layers[self.layer]
+        scale_x, scale_y = self.base_x * self.zoom, self.base_y * self.zoom
+        level = pyramid.level_for(max(scale_x, scale_y))
+
+        # Visible area in image pixels
+        wx0, wy0 = self.to_world(0, 0)
+        wx1, wy1 = self.to_world(self.view_width, self.view_height)
+        box = (wx0 / self.base_x, wy0 / self.base_y, wx1 / self.base_x, wy1 / self.base_y)
+
+        self.canvas.delete("tile")
+        self._visible = []
+        for tx, ty in pyramid.tile_range(level, *box):
+            x0, y0, x1, y1 = pyramid.tile_box(level, tx, ty)
+            sx0, sy0 = self.to_screen(x0 * self.base_x, y0 * self.base_y)
+            sx1, sy1 = self.to_screen(x1 * self.base_x, y1 * self.base_y)
+            # Rounded edges shared with the neighbours, so tiles meet without gaps
+            sx0, sy0, sx1, sy1 = round(sx0), round(sy0), round(sx1), round(sy1)
+            if sx1 <= sx0 or sy1 <= sy0:
+                continue
+            entry = self._scaled_tile(pyramid, level, tx, ty, sx1 - sx0, sy1 - sy0)
+            self._visible.append(entry)
+            self.canvas.create_image(sx0, sy0, anchor=tk.NW, image=entry.photo, tags="tile")
+        self.canvas.tag_lower("tile")
+
+    def _scaled_tile(self, pyramid, level, tx, ty, width, height):
+        key = (self.layer, level, tx, ty, width, height)
+        entry = self._photos.get(key)
+        if entry is not None:
+            self._photos.move_to_end(key)
+            if entry.layers is not None and entry.alpha != pyramid.alpha:
+                entry.blend(pyramid.alpha)
+            return entry
+
+        if isinstance(pyramid, BlendedPyramid):
+            layers = tuple(_scale(tile, width, height) for tile in pyramid.tiles(level, tx, ty))
+            image = Image.blend(layers[0], layers[1], pyramid.alpha)
+            entry = _ScaledTile(None, layers, pyramid.alpha, 3 * width * height)
+        else:
+            image = _scale(pyramid.tile(level, tx, ty), width, height)
+            entry = _ScaledTile(None, None, None, width * height)
+        entry.photo = ImageTk.PhotoImage(image, master=self.canvas)
+
+        self._photos[key] = entry
+        self._photo_pixels += entry.pixels
+        while self._photo_pixels > PHOTO_CACHE_PIXELS and len(self._photos) > 1:
+            _, evicted = self._photos.popitem(last=False)
+            self._photo_pixels -= evicted.pixels
+        return entry
+
+
+def _scale(tile, width, height):
+    # Magnified full-resolution tiles stay crisp (individual collision cells); the rest is smoothed
+    resample = Image.Resampling.NEAREST if width > tile.width else Image.Resampling.BILINEAR
+    return tile.resize((width, height), resample)
@@ -0,0 +1,191 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Samples marched per vectorized batch (bounds the temporary arrays to a few tens of MB)
+SAMPLE_BUDGET = 1 << 22
+# Point rows processed per block when enumerating unordered pairs
+PAIR_BLOCK = 256
+# Temporary floats per pruning batch (edges in a batch × points)
+PRUNE_BUDGET = 1 << 22
+# Pairs decided together when pruning: small batches let short edges prune the next ones almost as well as one at a time
+PRUNE_BATCH = 50
+# Stride of the coarse pre-pass: every Nth Bresenham sample is checked first to reject blocked segments cheaply
+COARSE_STRIDE = 8
+
+
+class LineOfSight:
+    """Line-of-sight queries over a nav_matrix grid (0 = water, anything else = land).
+
+    A segment is walked with the same Bresenham stepping as NavPointEditor.is_clear_path,
+    always from the lexicographically smaller endpoint so that (a, b) and (b, a) agree.
+    """
+
+    def __init__(self, nav_matrix, width, height):
+        self.width = width
+        self.height = height
+        self.land = np.asarray(nav_matrix, dtype=np.uint8).reshape(height, width) != 0
+        # Summed-area table of land cells: any box with zero land is clear without marching
+        # (int32 while the whole-grid count fits, so large grids keep a bounded 4 bytes per cell)
+        sat_dtype = np.int32 if width * height < 2**31 else np.int64
+        sat = np.zeros((height + 1, width + 1), dtype=sat_dtype)
+        np.cumsum(np.cumsum(self.land, axis=0, dtype=sat_dtype), axis=1, out=sat[1:, 1:])
+        self.land_sat = sat
+
+    def is_clear(self, x0, y0, x1, y1):
+        """Scalar line-of-sight check between two grid points."""
+        return bool(self.clear_segments(np.array([x0]), np.array([y0]), np.array([x1]), np.array([y1]))[0])
+
+    def clear_segments(self, x0, y0, x1, y1):
+        """Vectorized line-of-sight check for arrays of segments. Returns a bool array."""
+        x0, y0, x1, y1 = (np.asarray(a, dtype=np.int64) for a in (x0, y0, x1, y1))
+        # Canonical direction: walk from the smaller (x, y) endpoint
+        swap = (x1 < x0) | ((x1 == x0) & (y1 < y0))
+        x0, x1 = np.where(swap, x1, x0), np.where(swap, x0, x1)
+        y0, y1 = np.where(swap, y1, y0), np.where(swap, y0, y1)
+
+        clear = np.zeros(x0.shape, dtype=bool)
+
+        # Early reject: endpoints off the grid or on land
+        inside = self._inside(x0, y0) & self._inside(x1, y1)
+        idx = np.flatnonzero(inside)
+        idx = idx[~self.land[y0[idx], x0[idx]] & ~self.land[y1[idx], x1[idx]]]
+
+        # Early accept: Bresenham never leaves the bounding box, so an all-water box is clear
+        bx0, bx1 = x0[idx], x1[idx]
+        by0, by1 = np.minimum(y0[idx], y1[idx]), np.maximum(y0[idx], y1[idx])
+        sat = self.land_sat
+        land_in_box = sat[by1 + 1, bx1 + 1] - sat[by0, bx1 + 1] - sat[by1 + 1, bx0] + sat[by0, bx0]
+        clear[idx[land_in_box == 0]] = True
+
+        # Ray-march the rest in bounded batches: a coarse subset of the samples first, then the full walk
+        todo = idx[land_in_box != 0]
+        if todo.size:
+            todo = todo[self._march(x0[todo], y0[todo], x1[todo], y1[todo], COARSE_STRIDE)]
+        if todo.size:
+            clear[todo] = self._march(x0[todo], y0[todo], x1[todo], y1[todo], 1)
+        return clear
+
+    def _inside(self, x, y):
+        return (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+
+    def _march(self, x0, y0, x1, y1, stride):
+        """True for segments whose Bresenham samples at t = 0, stride, 2*stride, ... are all water."""
+        dx = np.abs(x1 - x0)
+        dy = np.abs(y1 - y0)
+        sx = np.where(x0 > x1, -1, 1)
+        sy = np.where(y0 > y1, -1, 1)
+        x_major = dx > dy
+        steps = np.maximum(dx, dy)
+        lengths = steps // stride + 1
+
+        result = np.empty(x0.shape, dtype=bool)
+        start = 0
+        count = len(x0)
+        while start < count:
+            # Grow the batch until the sample budget is reached (at least one segment)
+            ends = np.cumsum(lengths[start:])
+            stop = start + max(1, int(np.searchsorted(ends, SAMPLE_BUDGET, side="right")))
+            sl = slice(start, stop)
+            n = lengths[sl]
+            seg = np.repeat(np.arange(stop - start), n)
+            offsets = np.cumsum(n) - n
+            t = (np.arange(int(n.sum()), dtype=np.int64) - np.repeat(offsets, n)) * stride
+
+            # Minor-axis offset after t steps of the float-error Bresenham walk
+            major = np.maximum(steps[sl], 1)[seg]
+            minor_delta = np.where(x_major[sl], dy[sl], dx[sl])[seg]
+            minor = (2 * t * minor_delta + major - 1) // (2 * major)
+            xm = x_major[sl][seg]
+            px = x0[sl][seg] + sx[sl][seg] * np.where(xm, t, minor)
+            py = y0[sl][seg] + sy[sl][seg] * np.where(xm, minor, t)
+
+            blocked = self.land[py, px]
+            result[sl] = np.bincount(seg, weights=blocked, minlength=stop - start) == 0
+            start = stop
+        return result
+
+
+def visible_pairs(los, points):
+    """Return (i, j) index arrays of all unordered mutually visible pairs, i < j."""
+    pts = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    n = len(pts)
+    found_i = []
+    found_j = []
+    for block in range(0, n, PAIR_BLOCK):
+        rows = np.arange(block, min(block + PAIR_BLOCK, n))
+        # Every j > i for the rows in this block
+        counts = n - rows - 1
+        i = np.repeat(rows, counts)
+        j = np.arange(int(counts.sum()), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+        j += i + 1
+        if not i.size:
+            continue
+        ok = los.clear_segments(pts[i, 0], pts[i, 1], pts[j, 0], pts[j, 1])
+        found_i.append(i[ok])
+        found_j.append(j[ok])
+    if not found_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(found_i), np.concatenate(found_j)
+
+
+def build_adjacency(points, pairs):
+    """Adjacency lists [(j, float distance), ...] in increasing j order from unordered visible pairs."""
+    adj = [[] for _ in range(len(points))]
+    pair_i, pair_j = pairs
+    both_i = np.concatenate([pair_i, pair_j])
+    both_j = np.concatenate([pair_j, pair_i])
+    order = np.lexsort((both_j, both_i))
+    both_i = both_i[order]
+    both_j = both_j[order]
+    pts = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    delta = pts[both_i] - pts[both_j]
+    # Integer squared lengths are exact, so np.sqrt matches math.sqrt bit for bit
+    dist = np.sqrt((delta * delta).sum(axis=1).astype(np.float64))
+    for i, j, d in zip(both_i.tolist(), both_j.tolist(), dist.tolist()):
+        adj[i].append((j, d))
+    return adj
+
+
+PruneStats = namedtuple("PruneStats", ["edges_before", "edges_after", "too_long"])
+
+
+def prune_pairs(points, pairs, tolerance=0.01, max_length=None):
+    """Drop visible pairs whose route through already decided pairs is within (1 + tolerance).
+
+    Pairs are decided shortest first. bound[u, w] holds the length of a route between u and w that
+    the pruned graph really has: the edge itself when kept, the detour it was dropped for otherwise.
+    A pair is dropped only when bound[u, w] + bound[w, v] fits the tolerance, so every shortest path
+    of the pruned graph stays within (1 + tolerance) of the full graph. Edges longer than max_length
+    are removed up front; that cut is not covered by the bound, so measure it with
+    routing.path_deviation. Returns ((i, j) arrays, PruneStats).
+    """
+    pair_i, pair_j = (np.asarray(a, dtype=np.int64) for a in pairs)
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    n = len(pts)
+    length = np.hypot(*(pts[pair_i] - pts[pair_j]).T)
+    edges_before = len(pair_i)
+
+    too_long = 0
+    if max_length is not None:
+        short = length <= max_length
+        too_long = int((~short).sum())
+        pair_i, pair_j, length = pair_i[short], pair_j[short], length[short]
+
+    bound = np.full((n, n), np.inf)
+    keep = np.zeros(len(pair_i), dtype=bool)
+    order = np.argsort(length, kind="stable")
+    batch = max(1, min(PRUNE_BATCH, PRUNE_BUDGET // max(n, 1)))
+    for start in range(0, len(order), batch):
+        # Pairs within one batch only lean on pairs decided in earlier batches
+        b = order[start:start + batch]
+        u, v = pair_i[b], pair_j[b]
+        detour = (bound[u] + bound[v]).min(axis=1)
+        keep_b = detour > (1.0 + tolerance) * length[b]
+        keep[b[keep_b]] = True
+        route = np.where(keep_b, length[b], detour)
+        bound[u, v] = route
+        bound[v, u] = route
+
+    stats = PruneStats(edges_before, int(keep.sum()), too_long)
+    return (pair_i[keep], pair_j[keep]), stats
@@ -0,0 +1,269 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from datetime import datetime, timezone
+
+import numpy as np
+from PIL import Image
+
+# The tools are flat scripts: import them the way they import each other when run in place
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "New_Tools"), os.path.join(ROOT, "OLD_Tools")]
+
+import ImgConv  # New_Tools version
+import map_maker
+import map_viewer
+from nav_grid import NavGrid
+from routes import RouteService, validate_routes
+from visibility import LineOfSight
+
+MAPS = ("open_sea", "archipelago", "straits")
+POINT_COUNTS = (100, 350, 1000, 3000)
+QUICK_POINT_COUNTS = (100, 350)
+SEGMENT_SAMPLES = 5000  # point pairs per line-of-sight benchmark
+ROUTE_SAMPLES = 1000    # routes walked after loading the matrix
+DEFAULT_OUTPUT = "bench_output.json"
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_TOLERANCE = 0.10
+SEED = 1234
+
+
+# === Synthetic collision maps (0 = water, 1 = land) ===
+def open_sea(width, height, rng):
+    """Open water with a thin coastline around the frame."""
+    cells = np.zeros((height, width), dtype=np.uint8)
+    cells[:2] = cells[-2:] = 1
+    cells[:, :2] = cells[:, -2:] = 1
+    return cells
+
+
+def archipelago(width, height, rng):
+    """Open water dotted with round islands of mixed sizes."""
+    cells = open_sea(width, height, rng)
+    scale = width / 640
+    yy, xx = np.ogrid[:height, :width]
+    for _ in range(60):
+        cx, cy = rng.integers(0, width), rng.integers(0, height)
+        radius = rng.uniform(4, 24) * scale
+        cells[(xx - cx) ** 2 + (yy - cy) ** 2 <= radius * radius] = 1
+    return cells
+
+
+def straits(width, height, rng):
+    """Four basins split by land bands, connected only through narrow channels."""
+    cells = open_sea(width, height, rng)
+    gap = max(3, round(3 * width / 640))
+    band_y = slice(height // 2 - height // 10, height // 2 + height // 10)
+    band_x = slice(width // 2 - width // 12, width // 2 + width // 12)
+    cells[band_y, :] = 1
+    cells[:, band_x] = 1
+    for x in (width // 6, width // 3, 3 * width // 4):
+        cells[band_y, x:x + gap] = 0
+    for y in (height // 5, 4 * height // 5):
+        cells[y:y + gap, band_x] = 0
+    return cells
+
+
+MAP_BUILDERS = {"open_sea": open_sea, "archipelago": archipelago, "straits": straits}
+
+
+def water_points(cells, count, rng):
+    """count distinct random water cells as (x, y) tuples."""
+    water = np.flatnonzero(cells.reshape(-1) == 0)
+    chosen = np.sort(rng.choice(water, size=min(count, water.size), replace=False))
+    ys, xs = np.divmod(chosen, cells.shape[1])
+    return list(zip(xs.tolist(), ys.tolist()))
+
+
+def write_bmp(cells, path):
+    """Collision map as an RGB BMP (blue water, black land), the input ImgConv expects."""
+    rgb = np.zeros(cells.shape + (3,), dtype=np.uint8)
+    rgb[cells == 0] = (0, 0, 255)
+    Image.fromarray(rgb).save(path)
+
+
+# === Measurement ===
+def measure(fn, repeat, memory):
+    """Best-of-repeat wall time, plus peak traced allocations of one extra run when memory is set.
+
+    The tools' own progress prints are swallowed so they neither clutter the report nor get timed.
+    """
+    runs = []
+    peak = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            runs.append(time.perf_counter() - start)
+        if memory:
+            tracemalloc.start()
+            try:
+                fn()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return {"seconds": min(runs), "runs": runs, "peak_bytes": peak}
+
+
+def run_suite(maps, point_counts, scale, repeat, memory, jobs, workdir):
+    results = {}
+    rng = np.random.default_rng(SEED)
+    width, height = 640 * scale, 472 * scale
+
+    def record(name, map_name, points, fn):
+        key = f"{name}/{map_name}" + (f"/{points}" if points is not None else "")
+        print(f"⏱️  {key} ...", end=" ", flush=True)
+        result = measure(fn, repeat, memory)
+        result.update(stage=name, map=map_name, points=points)
+        results[key] = result
+        peak = f", peak {result['peak_bytes'] / 2**20:.1f} MiB" if result["peak_bytes"] is not None else ""
+        print(f"{result['seconds']:.4f} s{peak}")
+
+    for map_name in maps:
+        cells = MAP_BUILDERS[map_name](width, height, rng)
+        bmp_path = os.path.join(workdir, f"{map_name}.bmp")
+        dat_path = os.path.join(workdir, f"{map_name}_nav_matrix.dat")
+        write_bmp(cells, bmp_path)
+
+        record("bmp_to_dat", map_name, None, lambda: ImgConv.bmp_to_dat(bmp_path, dat_path, None))
+        record("dat_to_bmp", map_name, None,
+               lambda: ImgConv.dat_to_bmp(dat_path, os.path.join(workdir, f"{map_name}_reconstructed.bmp")))
+
+        grid = NavGrid.open(dat_path)
+        los = LineOfSight(grid.cells, grid.width, grid.height)
+        # NavPointEditor.is_clear_path only needs is_walkable from the editor
+        editor = types.SimpleNamespace(is_walkable=grid.is_walkable)
+
+        for count in point_counts:
+            points = water_points(grid.cells, count, rng)
+            n = len(points)
+            pairs = rng.integers(0, n, size=(SEGMENT_SAMPLES, 2))
+            segments = [points[i] + points[j] for i, j in pairs.tolist()]
+            seg = np.array(segments, dtype=np.int64).T
+            matrix_path = os.path.join(workdir, f"{map_name}_{n}_matrix_int.dat")
+            route_pairs = rng.integers(0, n, size=(ROUTE_SAMPLES, 2)).tolist()
+
+            def clear_path_loop():
+                for x0, y0, x1, y1 in segments:
+                    map_maker.NavPointEditor.is_clear_path(editor, x0, y0, x1, y1)
+
+            def verify_all_points():
+                # NavPointEditor.verify_all_points without the canvas drawing
+                map_maker.connectivity_report(grid, map_maker.nearest_neighbor_order(points))
+
+            def generate_matrix_file():
+                # What NavPointEditor.generate_matrix_file runs on its worker thread
+                map_maker.generate_matrix(matrix_path, grid, points, jobs=jobs)
+
+            def load_matrix():
+                with map_viewer.load_matrix(matrix_path, n) as matrix:
+                    matrix.records
+
+            def load_matrix_routes():
+                with map_viewer.load_matrix(matrix_path, n) as matrix:
+                    RouteService(matrix).routes(route_pairs)
+
+            def validate_all_routes():
+                with map_viewer.load_matrix(matrix_path, n) as matrix:
+                    validate_routes(matrix)
+
+            record("is_clear_path", map_name, n, clear_path_loop)
+            record("clear_segments", map_name, n, lambda: los.clear_segments(*seg))
+            record("verify_all_points", map_name, n, verify_all_points)
+            record("generate_matrix_file", map_name, n, generate_matrix_file)
+            record("load_matrix", map_name, n, load_matrix)
+            record("load_matrix_routes", map_name, n, load_matrix_routes)
+            record("validate_routes", map_name, n, validate_all_routes)
+    return results
+
+
+# === Baseline comparison ===
+def compare(results, baseline, tolerance):
+    """Print current vs baseline times; returns the keys slower than (1 + tolerance) × baseline."""
+    regressions = []
+    print(f"\n{'benchmark':<40} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<40} {'-':>10} {result['seconds']:>10.4f} {'new':>7}")
+            continue
+        ratio = result["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions.append(key)
+            flag = " ⚠️"
+        elif ratio < 1 - tolerance:
+            flag = " ✅"
+        print(f"{key:<40} {base['seconds']:>10.4f} {result['seconds']:>10.4f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Headless benchmarks of the nav data pipeline on synthetic maps")
+    parser.add_argument("--maps", nargs="+", choices=MAPS, default=list(MAPS), help="synthetic maps to run")
+    parser.add_argument("--points", nargs="+", type=int, default=None,
+                        help=f"point set sizes (default: {' '.join(map(str, POINT_COUNTS))})")
+    parser.add_argument("--quick", action="store_true",
+                        help=f"only {' and '.join(map(str, QUICK_POINT_COUNTS))} points (ignored with --points)")
+    parser.add_argument("--scale", type=int, default=1, help="grid resolution factor per side (1 = 640x472)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark, the best one is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the extra traced run for peak memory")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes for the matrix (default: 1)")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="machine-readable results (JSON)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative slowdown reported as a regression (default: 0.10)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    point_counts = args.points or (QUICK_POINT_COUNTS if args.quick else POINT_COUNTS)
+
+    with tempfile.TemporaryDirectory(prefix="nav_bench_") as workdir:
+        results = run_suite(args.maps, point_counts, args.scale, args.repeat, not args.no_memory, args.jobs, workdir)
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "scale": args.scale,
+            "repeat": args.repeat,
+            "jobs": args.jobs,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {len(results)} results to {args.output}")
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) over {args.tolerance:.0%}: {', '.join(regressions)}")
+        else:
+            print("\n✅ No regressions against the baseline")
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
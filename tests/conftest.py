@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The tools are flat scripts: import them the way they import each other when run in place
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "OLD_Tools"))
@@ -0,0 +1,62 @@
+import importlib.util
+import os
+
+import numpy as np
+from PIL import Image
+
+from conftest import ROOT
+
+
+def load_align_check():
+    spec = importlib.util.spec_from_file_location("align_check", os.path.join(ROOT, "New_Tools", "align_check.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def blob_map(shape, seed):
+    """Random land blobs (1) on sea (0), irregular enough that only the true shift lines up."""
+    rng = np.random.default_rng(seed)
+    cells = np.zeros(shape, dtype=np.uint8)
+    yy, xx = np.mgrid[:shape[0], :shape[1]]
+    for _ in range(25):
+        cx, cy, radius = rng.integers(0, shape[1]), rng.integers(0, shape[0]), rng.uniform(2, 7)
+        cells[(xx - cx) ** 2 + (yy - cy) ** 2 <= radius * radius] = 1
+    return cells
+
+
+def rgb(cells):
+    image = np.zeros(cells.shape + (3,), dtype=np.uint8)
+    image[cells == 0] = (0, 0, 255)
+    return image
+
+
+def test_best_offset_recovers_a_known_shift():
+    align_check = load_align_check()
+    world = blob_map((70, 90), seed=1)
+    margin = 5
+    reference = world[margin:margin + 60, margin:margin + 80]
+    for dx, dy in [(0, 0), (3, -2), (-4, 4), (1, 0)]:
+        # cells[y, x] shows reference[y + dy, x + dx]
+        cells = world[margin + dy:margin + dy + 60, margin + dx:margin + dx + 80]
+        assert align_check.best_offset(reference, cells) == (dx, dy, 0.0)
+
+
+def test_score_alignment_reports_the_shift_of_a_collision_map(tmp_path):
+    align_check = load_align_check()
+    world = blob_map((70, 90), seed=2)
+    reference = world[5:65, 5:85]
+    collision = world[7:67, 4:84]  # dx = -1, dy = 2
+
+    border = 8
+    main = np.kron(rgb(reference), np.ones((2, 2, 1), dtype=np.uint8))  # main map at twice the grid resolution
+    main = np.pad(main, ((border, border), (border, border), (0, 0)))
+    Image.fromarray(main).save(tmp_path / "main.bmp")
+    Image.fromarray(rgb(collision)).save(tmp_path / "collision.bmp")
+
+    report, heatmap = align_check.score_alignment(str(tmp_path / "main.bmp"), str(tmp_path / "collision.bmp"),
+                                                  border=border)
+    assert report["size"] == [80, 60]
+    assert report["score"] < 0.95
+    assert report["best_offset"] == {"dx": -1, "dy": 2, "score": 1.0}
+    assert heatmap.shape == (4, 5)
@@ -0,0 +1,68 @@
+import random
+
+from connectivity import articulation_points_and_bridges, connected_components, verify_connectivity
+
+
+def random_graph(n, edges, rng):
+    pairs = set()
+    while len(pairs) < edges:
+        a, b = rng.sample(range(n), 2)
+        pairs.add((min(a, b), max(a, b)))
+    return sorted(pairs)
+
+
+def adjacency(n, pairs):
+    adj = [[] for _ in range(n)]
+    for a, b in pairs:
+        adj[a].append((b, 1.0))
+        adj[b].append((a, 1.0))
+    return adj
+
+
+def count_components(nodes, pairs):
+    """Components by repeated flood fill, over the given nodes only."""
+    neighbours = {u: set() for u in nodes}
+    for a, b in pairs:
+        if a in neighbours and b in neighbours:
+            neighbours[a].add(b)
+            neighbours[b].add(a)
+    seen = set()
+    count = 0
+    for start in nodes:
+        if start in seen:
+            continue
+        count += 1
+        todo = [start]
+        seen.add(start)
+        while todo:
+            for v in neighbours[todo.pop()] - seen:
+                seen.add(v)
+                todo.append(v)
+    return count
+
+
+def test_cut_vertices_and_bridges_match_remove_and_recount():
+    rng = random.Random(2)
+    for _ in range(60):
+        n = rng.randrange(2, 25)
+        pairs = random_graph(n, rng.randrange(0, min(n * (n - 1) // 2, 2 * n) + 1), rng)
+        adj = adjacency(n, pairs)
+        nodes = list(range(n))
+        total = count_components(nodes, pairs)
+
+        cut = [v for v in nodes
+               if count_components([u for u in nodes if u != v], pairs) > total - (not adj[v])]
+        bridges = [edge for edge in pairs if count_components(nodes, [p for p in pairs if p != edge]) > total]
+        assert articulation_points_and_bridges(adj) == (cut, bridges), (n, pairs)
+        assert len(connected_components(adj)) == total
+
+
+def test_report_splits_isolated_and_unreachable_nodes():
+    # Main network 0-1-2-3 (a chain: every inner node and edge is critical), a pair 4-5, node 6 alone
+    adj = adjacency(7, [(0, 1), (1, 2), (2, 3), (4, 5)])
+    report = verify_connectivity(adj)
+    assert report.components == [[0, 1, 2, 3], [4, 5], [6]]
+    assert report.isolated == [6]
+    assert report.unreachable == [4, 5]
+    assert report.articulation_points == [1, 2]
+    assert report.bridges == [(0, 1), (1, 2), (2, 3), (4, 5)]
@@ -0,0 +1,42 @@
+import numpy as np
+
+from contour_points import distance_to_land, generate_contour_points
+
+
+def islands(seed, shape=(50, 70), count=8):
+    rng = np.random.default_rng(seed)
+    grid = np.zeros(shape, dtype=np.uint8)
+    yy, xx = np.mgrid[:shape[0], :shape[1]]
+    for _ in range(count):
+        cx, cy, radius = rng.integers(0, shape[1]), rng.integers(0, shape[0]), rng.uniform(2, 8)
+        grid[(xx - cx) ** 2 + (yy - cy) ** 2 <= radius * radius] = 1
+    grid[rng.random(shape) < 0.01] = 1  # single-cell rocks
+    return grid
+
+
+def brute_distance(grid, max_dist):
+    land_y, land_x = np.nonzero(grid)
+    yy, xx = np.mgrid[:grid.shape[0], :grid.shape[1]]
+    d2 = (xx[..., None] - land_x) ** 2 + (yy[..., None] - land_y) ** 2
+    return np.minimum(np.sqrt(d2.min(axis=-1)), max_dist)
+
+
+def test_distance_transform_matches_brute_force():
+    for seed in range(3):
+        grid = islands(seed)
+        assert np.allclose(distance_to_land(grid, 9.5), brute_distance(grid, 9.5))
+
+
+def test_contour_points_stay_off_land():
+    for seed in range(3):
+        grid = islands(seed)
+        distance = brute_distance(grid, 100)
+        for spacing, min_dist, levels in ((3, 4, 1), (2, 2, 3), (5, 3, 2)):
+            points = np.array(generate_contour_points(grid, spacing, min_dist, levels))
+            assert len(points)
+            xs, ys = points[:, 0], points[:, 1]
+            assert (grid[ys, xs] == 0).all()
+            assert (distance[ys, xs] >= min_dist).all()
+            gaps = np.hypot(*(points[:, None, :] - points[None, :, :]).transpose(2, 0, 1))
+            np.fill_diagonal(gaps, np.inf)
+            assert gaps.min() > 0.75 * spacing
@@ -0,0 +1,108 @@
+import importlib.util
+import os
+import struct
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import ROOT
+
+OLD_COPY = os.path.join(ROOT, "OLD_Tools", "ImgConv.py")
+NEW_COPY = os.path.join(ROOT, "New_Tools", "ImgConv.py")
+
+
+def load(path):
+    spec = importlib.util.spec_from_file_location("ImgConv", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_both_methods_ship_the_same_converter():
+    with open(OLD_COPY, "rb") as old, open(NEW_COPY, "rb") as new:
+        assert old.read() == new.read()
+
+
+def test_size_comes_from_the_header(tmp_path):
+    imgconv = load(NEW_COPY)
+    rgb = np.zeros((30, 40, 3), dtype=np.uint8)
+    rgb[:, :25] = (0, 0, 255)  # sea on the left, land on the right
+    bmp = str(tmp_path / "collision.bmp")
+    Image.fromarray(rgb).save(bmp)
+
+    dat = imgconv.bmp_to_dat(bmp, str(tmp_path / "nav_matrix.dat"), size=None)
+    with open(dat, "rb") as f:
+        data = f.read()
+    assert struct.unpack_from("<HH", data) == (40, 30)
+    cells = np.frombuffer(data, dtype=np.uint8, offset=4).reshape(30, 40)
+    assert (cells[:, :25] == 0).all() and (cells[:, 25:] == 1).all()
+
+    back = imgconv.dat_to_bmp(dat, str(tmp_path / "back.bmp"))
+    assert np.array_equal(np.asarray(Image.open(back).convert("RGB")), rgb)
+
+
+def write_bmp(path, width=20, height=10):
+    rgb = np.zeros((height, width, 3), dtype=np.uint8)
+    rgb[:, :width // 2] = (0, 0, 255)
+    Image.fromarray(rgb).save(str(path))
+    return str(path)
+
+
+def test_batch_converts_and_skips(tmp_path, capsys):
+    imgconv = load(NEW_COPY)
+    maps = tmp_path / "maps"
+    maps.mkdir()
+    write_bmp(maps / "a.bmp")
+    write_bmp(maps / "b.BMP")
+    (maps / "notes.txt").write_text("not an image")
+    assert imgconv.collect_inputs([str(maps)], ".bmp") == [str(maps / "a.bmp"), str(maps / "b.BMP")]
+
+    out = tmp_path / "out"
+    assert imgconv.main([str(maps), "-o", str(out), "-j", "1", "-s", "native"]) == 0
+    assert sorted(os.listdir(out)) == ["a_nav_matrix.dat", "b_nav_matrix.dat"]
+
+    # A nav_vec.dat next to the maps is skipped, not a failure
+    with open(out / "nav_vec.dat", "wb") as f:
+        f.write(struct.pack("<HH", 1, 0) + struct.pack("<HH", 3, 4))
+    assert imgconv.main([str(out), "-r", "-j", "1"]) == 0
+    assert "nav_vec.dat: skipped" in capsys.readouterr().out
+    assert os.path.exists(out / "a_nav_matrix_reconstructed.bmp")
+    assert not os.path.exists(out / "nav_vec_reconstructed.bmp")
+
+
+def test_batch_exit_codes(tmp_path):
+    imgconv = load(NEW_COPY)
+    assert imgconv.main([str(tmp_path / "missing*.bmp")]) == 1
+
+    (tmp_path / "broken.bmp").write_bytes(b"BM not really a bitmap")
+    assert imgconv.main([str(tmp_path / "broken.bmp"), "-j", "1"]) == 1
+
+    for folder in ("north", "south"):
+        (tmp_path / folder).mkdir()
+        write_bmp(tmp_path / folder / "map.bmp")
+    collide = [str(tmp_path / "north"), str(tmp_path / "south"), "-o", str(tmp_path / "out")]
+    with pytest.raises(SystemExit) as exit_info:
+        imgconv.main(collide)
+    assert exit_info.value.code == 2
+    assert not os.path.exists(tmp_path / "out")
+
+    with pytest.raises(SystemExit) as exit_info:
+        imgconv.main([str(tmp_path / "north"), "-j", "0"])
+    assert exit_info.value.code == 2
+
+
+def test_vectorized_classifier_matches_per_pixel_rule():
+    imgconv = load(NEW_COPY)
+    rng = np.random.default_rng(9)
+    mixed = rng.integers(0, 256, (40, 64, 3), dtype=np.uint8)
+    # Every combination of values around the thresholds: b vs r/g ties, b = 100/101, grey levels near 50
+    edge = np.array([0, 1, 49, 50, 51, 99, 100, 101, 149, 150, 151, 254, 255], dtype=np.uint8)
+    thresholds = np.stack(np.meshgrid(edge, edge, edge, indexing="ij"), axis=-1).reshape(13, 169, 3)
+
+    for rgb in (mixed, thresholds):
+        expected = np.array([[imgconv.classify_pixel(*map(int, pixel)) for pixel in row] for row in rgb],
+                            dtype=np.uint8)
+        result = imgconv.classify_pixels(rgb)
+        assert result.dtype == np.uint8
+        assert result.tobytes() == expected.tobytes()
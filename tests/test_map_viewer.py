@@ -0,0 +1,33 @@
+import importlib
+import struct
+import sys
+
+from nav_vec import write_points
+
+
+def test_import_does_not_read_the_working_directory(tmp_path, monkeypatch):
+    # A nav_matrix.dat in the working directory is only read when the viewer starts
+    (tmp_path / "nav_matrix.dat").write_bytes(b"\xff")
+    monkeypatch.chdir(tmp_path)
+    sys.modules.pop("map_viewer", None)
+    map_viewer = importlib.import_module("map_viewer")
+    assert (map_viewer.OLD_WIDTH, map_viewer.OLD_HEIGHT) == (640, 472)
+
+
+def test_points_scale_with_the_grid_size(tmp_path):
+    import map_viewer
+
+    nav_matrix = tmp_path / "nav_matrix.dat"
+    nav_matrix.write_bytes(struct.pack("<HH", 1280, 944) + bytes(1280 * 944))
+    size = map_viewer.grid_size(str(nav_matrix))
+    assert size == (1280, 944)
+    assert map_viewer.grid_size(str(tmp_path / "missing.dat")) == (640, 472)
+
+    nav_vec = str(tmp_path / "nav_vec.dat")
+    coords = [(0, 0), (640, 472), (1280, 944), (333, 17)]
+    write_points(nav_vec, coords)
+    points = map_viewer.load_points(nav_vec, size)
+    assert points == [map_viewer.scale_and_offset(x, y, size) for x, y in coords]
+    # Twice the grid resolution: the same canvas position as half the coordinates on the stock grid
+    assert points[1] == map_viewer.scale_and_offset(320, 236)
+    assert points[2] == map_viewer.scale_and_offset(640, 472)
@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pytest
+
+from matrix_int import (ENTRY_SIZE, MATRIX_DTYPE, MAX_POINTS, MatrixInt, MatrixWriter, check_point_count,
+                        points_from_size)
+from routing import all_pairs, encode_matrix, write_matrix
+
+
+def ring(n):
+    adj = [[] for _ in range(n)]
+    for a in range(n):
+        b = (a + 1) % n
+        adj[a].append((b, 1.5))
+        adj[b].append((a, 1.5))
+    return adj
+
+
+def test_out_of_order_rows_match_encode_matrix(tmp_path):
+    n = 7
+    dist, first = all_pairs(ring(n))
+    expected = encode_matrix(dist, first)
+    rows = expected.view(MATRIX_DTYPE).reshape(n, n)
+
+    path = str(tmp_path / "matrix_int.dat")
+    with MatrixWriter(path, n) as writer:
+        for source in (4, 0, 6, 2, 1, 5, 3):
+            writer.write_row(source, rows[source])
+    with open(path, "rb") as f:
+        assert f.read() == expected.tobytes()
+    assert not os.path.exists(path + ".part")
+
+
+def test_write_matrix_matches_encode_matrix(tmp_path):
+    adj = ring(9)
+    path = str(tmp_path / "matrix_int.dat")
+    write_matrix(path, adj)
+    with open(path, "rb") as f:
+        assert f.read() == encode_matrix(*all_pairs(adj)).tobytes()
+    with MatrixInt(path, 9) as matrix:
+        assert matrix.entry(0, 4) == (round(4 * 1.5 * 65536), 1)
+
+
+def test_failed_write_keeps_target_and_removes_part(tmp_path):
+    path = str(tmp_path / "matrix_int.dat")
+    with open(path, "wb") as f:
+        f.write(b"previous")
+
+    with pytest.raises(RuntimeError):
+        with MatrixWriter(path, 3) as writer:
+            writer.write_row(0, np.zeros(3, dtype=MATRIX_DTYPE))
+            raise RuntimeError("cancelled")
+
+    with open(path, "rb") as f:
+        assert f.read() == b"previous"
+    assert not os.path.exists(path + ".part")
+
+
+def test_rows_of_the_wrong_size_are_rejected(tmp_path):
+    with MatrixWriter(str(tmp_path / "m.dat"), 3) as writer:
+        with pytest.raises(ValueError):
+            writer.write_row(0, np.zeros(4, dtype=MATRIX_DTYPE))
+        with pytest.raises(ValueError):
+            writer.write_rows(2, np.zeros((2, 3), dtype=MATRIX_DTYPE))
+
+
+def test_points_from_size():
+    assert points_from_size(0) == 0
+    assert points_from_size(25 * ENTRY_SIZE) == 5
+    for size in (24 * ENTRY_SIZE, 25 * ENTRY_SIZE + 1, ENTRY_SIZE - 1):
+        with pytest.raises(ValueError):
+            points_from_size(size)
+
+
+def test_matrix_int_checks_expected_count(tmp_path):
+    path = str(tmp_path / "matrix_int.dat")
+    write_matrix(path, ring(4))
+    with pytest.raises(ValueError):
+        MatrixInt(path, 5).records
+
+
+def test_check_point_count_limit(tmp_path):
+    check_point_count(MAX_POINTS)
+    with pytest.raises(ValueError):
+        check_point_count(MAX_POINTS + 1)
+    # Nothing is created when the count cannot be stored
+    path = str(tmp_path / "m.dat")
+    with pytest.raises(ValueError):
+        MatrixWriter(path, MAX_POINTS + 1)
+    assert not os.listdir(tmp_path)
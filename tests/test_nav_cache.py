@@ -0,0 +1,58 @@
+import os
+import time
+
+import numpy as np
+
+from nav_cache import NavCache, cache_key, default_cache_dir
+
+
+def test_key_depends_on_content_not_form():
+    cells = np.zeros((4, 5), dtype=np.uint8)
+    key = cache_key(cells, [(1, 2), (3, 4)], width=5, height=4)
+    assert key == cache_key(cells.tobytes(), np.array([[1, 2], [3, 4]]), height=4, width=5)
+
+    cells[0, 0] = 1
+    assert cache_key(cells, [(1, 2), (3, 4)], width=5, height=4) != key
+    assert cache_key(np.zeros((4, 5), dtype=np.uint8), [(3, 4), (1, 2)], width=5, height=4) != key
+    assert cache_key(np.zeros((4, 5), dtype=np.uint8), [(1, 2), (3, 4)], width=5, height=4, prune=0.01) != key
+
+
+def test_fetch_needs_every_artifact(tmp_path):
+    cache = NavCache(str(tmp_path / "cache"))
+    vec = tmp_path / "nav_vec.dat"
+    vec.write_bytes(b"points")
+    matrix = tmp_path / "matrix_int.dat"
+    targets = {"nav_vec.dat": str(vec), "matrix_int.dat": str(matrix)}
+
+    cache.store("k", "nav_vec.dat", str(vec))
+    assert not cache.fetch("k", targets)
+    assert not matrix.exists()
+
+    matrix.write_bytes(b"matrix")
+    cache.store("k", "matrix_int.dat", str(matrix))
+    vec.write_bytes(b"edited")
+    matrix.unlink()
+    assert cache.fetch("k", targets)
+    assert vec.read_bytes() == b"points" and matrix.read_bytes() == b"matrix"
+    assert not cache.fetch("other", targets)
+
+
+def test_evict_drops_expired_then_least_recently_used(tmp_path):
+    cache = NavCache(str(tmp_path / "cache"), max_bytes=25, max_age=3600)
+    source = tmp_path / "artifact"
+    source.write_bytes(b"x" * 10)
+    now = time.time()
+    for age, key in ((7200, "expired"), (300, "old"), (200, "recent")):
+        cache.store(key, "artifact", str(source))
+        os.utime(os.path.join(cache.directory, key), (now - age, now - age))
+
+    cache.store("new", "artifact", str(source))
+    assert sorted(os.listdir(cache.directory)) == ["new", "recent"]
+
+
+def test_default_directory_is_per_user(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path))
+    directory = default_cache_dir()
+    assert directory.startswith(str(tmp_path))
+    assert NavCache().directory == directory
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from nav_grid import NavGrid, read_size
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_open_and_to_bytes_round_trip(tmp_path, use_mmap):
+    rng = np.random.default_rng(6)
+    width, height = 37, 23
+    cells = rng.integers(0, 3, (height, width), dtype=np.uint8)
+    path = tmp_path / "nav_matrix.dat"
+    path.write_bytes(NavGrid(cells, width, height).to_bytes())
+
+    assert read_size(str(path)) == (width, height)
+    grid = NavGrid.open(str(path), use_mmap=use_mmap)
+    assert (grid.width, grid.height) == (width, height)
+    assert np.array_equal(grid.cells, cells)
+    assert grid.to_bytes() == path.read_bytes()
+
+    # Scalar and vectorized walkability agree with the cells, including off-grid queries
+    xs, ys = np.meshgrid(np.arange(-2, width + 2), np.arange(-2, height + 2))
+    expected = [[0 <= x < width and 0 <= y < height and cells[y, x] == 0 for x in range(-2, width + 2)]
+                for y in range(-2, height + 2)]
+    assert grid.walkable(xs, ys).tolist() == expected
+    assert [[grid.is_walkable(x, y) for x in range(-2, width + 2)] for y in range(-2, height + 2)] == expected
+
+
+def test_open_rejects_a_truncated_file(tmp_path):
+    path = tmp_path / "nav_matrix.dat"
+    path.write_bytes(NavGrid.empty(10, 10).to_bytes()[:-1])
+    with pytest.raises(ValueError):
+        NavGrid.open(str(path))
+    path.write_bytes(b"\x0a")
+    with pytest.raises(ValueError):
+        NavGrid.open(str(path))
@@ -0,0 +1,50 @@
+import struct
+
+import numpy as np
+import pytest
+
+from matrix_int import MAX_POINTS
+from nav_vec import decode_points, encode_points, read_points, write_points
+
+
+def test_round_trip(tmp_path):
+    points = [(0, 0), (639, 471), (12, 345)]
+    path = str(tmp_path / "nav_vec.dat")
+    write_points(path, points)
+
+    with open(path, "rb") as f:
+        data = f.read()
+    # uint16 count + 2 padding bytes, then uint16 x, y per point
+    assert data == struct.pack("<HH", 3, 0) + b"".join(struct.pack("<2H", x, y) for x, y in points)
+
+    loaded = read_points(path)
+    assert loaded.dtype == np.uint16
+    assert loaded.shape == (3, 2)
+    assert loaded.tolist() == [list(p) for p in points]
+
+
+def test_empty_file_round_trip():
+    assert decode_points(encode_points([])).shape == (0, 2)
+
+
+def test_header_and_length_are_checked():
+    good = encode_points([(1, 2), (3, 4)])
+    with pytest.raises(ValueError, match="too short"):
+        decode_points(good[:3])
+    with pytest.raises(ValueError, match="padding"):
+        decode_points(struct.pack("<HH", 2, 1) + good[4:])
+    with pytest.raises(ValueError, match="expected"):
+        decode_points(good[:-1])
+    with pytest.raises(ValueError, match="expected"):
+        decode_points(good + b"\0\0\0\0")
+
+
+def test_unstorable_points_write_nothing(tmp_path):
+    path = tmp_path / "nav_vec.dat"
+    with pytest.raises(ValueError):
+        write_points(str(path), [(-1, 5)])
+    with pytest.raises(ValueError):
+        write_points(str(path), [(70000, 5)])
+    with pytest.raises(ValueError):
+        write_points(str(path), np.zeros((MAX_POINTS + 1, 2), dtype=np.int64))
+    assert not path.exists()
@@ -0,0 +1,95 @@
+import random
+
+from matrix_int import MATRIX_DTYPE
+from routes import (
+    ROUTE_BAD_NODE, ROUTE_DEAD_END, ROUTE_MISMATCH, ROUTE_NO_PATH, ROUTE_OK, RouteService, validate_routes,
+)
+from routing import all_pairs, encode_matrix
+
+
+def chain(nodes, start=0):
+    """Adjacency edges of a path start → start+1 → ... with unit lengths."""
+    return [(a, b, 1.0) for a, b in zip(range(start, start + nodes - 1), range(start + 1, start + nodes))]
+
+
+def build_matrix(n, edges):
+    adj = [[] for _ in range(n)]
+    for a, b, d in edges:
+        adj[a].append((b, d))
+        adj[b].append((a, d))
+    dist, first = all_pairs(adj)
+    return encode_matrix(dist, first).view(MATRIX_DTYPE).reshape(n, n)
+
+
+def test_isolated_component_is_no_path():
+    # Main network 0..4 and an isolated lagoon 5..6: lagoon routes are stored as (0, 0)
+    matrix = build_matrix(7, chain(5) + chain(2, start=5))
+    assert tuple(matrix[6][1]) == (0, 0)
+    service = RouteService(matrix)
+
+    route = service.route(6, 1)
+    assert route.status == ROUTE_NO_PATH
+    assert route.nodes == (6,)
+    assert route.distance == 0
+
+    pairs = [(a, b) for a in range(7) for b in range(7)]
+    walked = RouteService(matrix).routes(pairs)
+    for (a, b), batch in zip(pairs, walked):
+        single = service.route(a, b)
+        assert batch == single
+        connected = (a < 5) == (b < 5)
+        assert batch.status == (ROUTE_OK if connected else ROUTE_NO_PATH)
+
+
+def test_routes_follow_next_node():
+    matrix = build_matrix(5, chain(5))
+    route = RouteService(matrix).route(0, 4)
+    assert route.status == ROUTE_OK
+    assert route.nodes == (0, 1, 2, 3, 4)
+    assert route.distance == 4 * 65536
+
+
+def test_validate_routes_flags_loops_and_mismatches():
+    matrix = build_matrix(6, chain(6)).copy()
+    report = validate_routes(matrix)
+    assert report.counts[ROUTE_OK] == report.pairs == 30
+
+    matrix[2, 5]["next_node"] = 1   # 1 → 2 → 1 toward 5
+    matrix[0, 1]["dist"] += 1000    # routes starting with the 0 → 1 hop no longer add up
+    report = validate_routes(matrix)
+    assert report.examples["loop"] == [(0, 5), (1, 5), (2, 5)]
+    assert report.examples["distance_mismatch"] == [(0, 2), (0, 3), (0, 4)]
+
+
+def test_walk_stops_at_dead_ends_and_bad_nodes():
+    matrix = build_matrix(4, chain(4)).copy()
+    matrix[1, 3] = (0, 0)            # 0 → 1, but 1 has no route to 3
+    matrix[0, 2]["next_node"] = 7    # outside the 4-node matrix
+    service = RouteService(matrix)
+
+    assert service.route(0, 3) == ((0, 1), 3 * 65536, ROUTE_DEAD_END)
+    assert service.route(0, 2) == ((0,), 2 * 65536, ROUTE_BAD_NODE)
+    assert RouteService(matrix).routes([(0, 3), (0, 2)]) == [service.route(0, 3), service.route(0, 2)]
+
+
+def test_walk_agrees_with_validate_routes():
+    rng = random.Random(5)
+    n = 12
+    edges = chain(n) + [(rng.randrange(n), rng.randrange(n), rng.uniform(1, 3)) for _ in range(10)]
+    matrix = build_matrix(n, [(a, b, d) for a, b, d in edges if a != b]).copy()
+    for _ in range(25):
+        a, b = rng.randrange(n), rng.randrange(n)
+        if rng.random() < 0.5:
+            matrix[a, b]["next_node"] = rng.randrange(n + 3)
+        else:
+            matrix[a, b]["dist"] = 0
+
+    report = validate_routes(matrix, max_examples=n * n)
+    expected = {pair: status for status, pairs in report.examples.items() for pair in pairs}
+    pairs = [(a, b) for a in range(n) for b in range(n) if a != b]
+    service = RouteService(matrix)
+    for pair, batch in zip(pairs, RouteService(matrix).routes(pairs)):
+        single = service.route(*pair)
+        assert batch == single
+        # Distance mismatches are only found by validate_routes; the walk itself reaches the target
+        assert single.status == {ROUTE_MISMATCH: ROUTE_OK}.get(expected.get(pair), expected.get(pair, ROUTE_OK))
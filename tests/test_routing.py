@@ -0,0 +1,60 @@
+import numpy as np
+
+from routing import IncrementalRouter, all_pairs, build_graph
+from visibility import LineOfSight
+
+
+def sea_with_lagoon():
+    """Open sea with an island, and a walled-off lagoon so that some pairs are unreachable."""
+    cells = np.zeros((60, 80), dtype=np.uint8)
+    cells[20:35, 25:45] = 1
+    cells[45:, 60:] = 1
+    cells[50:58, 65:78] = 0
+    return cells
+
+
+def random_water_point(cells, rng):
+    water = np.flatnonzero(cells.reshape(-1) == 0)
+    y, x = divmod(int(rng.choice(water)), cells.shape[1])
+    return x, y
+
+
+def check_against_scratch(router, los):
+    adj = build_graph(los, router.points)
+    assert router.adjacency() == adj
+    dist, _ = all_pairs(adj)
+    assert np.array_equal(np.isinf(router.dist), np.isinf(dist))
+    reachable = np.isfinite(dist)
+    assert np.allclose(router.dist[reachable], dist[reachable], rtol=1e-9, atol=1e-9)
+
+    # Any first hop on a shortest path is fine: ties may be broken differently than from scratch
+    n = len(router.points)
+    for s in range(n):
+        for t in range(n):
+            hop = router.first[s, t]
+            if s == t:
+                assert hop == s
+            elif not reachable[s, t]:
+                assert hop == -1
+            else:
+                assert hop in router.neighbors[s]
+                assert np.isclose(router.neighbors[s][hop] + dist[hop, t], dist[s, t], rtol=1e-9)
+
+
+def test_random_edits_match_a_full_rebuild():
+    cells = sea_with_lagoon()
+    los = LineOfSight(cells, cells.shape[1], cells.shape[0])
+    rng = np.random.default_rng(8)
+    points = [random_water_point(cells, rng) for _ in range(20)] + [(70, 54), (75, 52)]
+    router = IncrementalRouter(los, points, jobs=1)
+    check_against_scratch(router, los)
+
+    for _ in range(40):
+        action = rng.choice(["add", "move", "remove"])
+        if action == "add" or len(router.points) < 5:
+            router.add_point(random_water_point(cells, rng))
+        elif action == "move":
+            router.move_point(int(rng.integers(len(router.points))), random_water_point(cells, rng))
+        else:
+            router.remove_point(int(rng.integers(len(router.points))))
+        check_against_scratch(router, los)
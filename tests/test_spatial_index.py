@@ -0,0 +1,47 @@
+import math
+import random
+
+from spatial_index import PointGrid
+
+
+def linear_nearest(points, x, y, max_dist=math.inf):
+    found = [((px - x) ** 2 + (py - y) ** 2, i) for i, (px, py) in enumerate(points)]
+    found = [key for key in found if key[0] <= max_dist * max_dist]
+    return min(found)[1] if found else None
+
+
+def linear_hit(points, x, y, half_size, strict):
+    found = []
+    for i, (px, py) in enumerate(points):
+        dx, dy = abs(px - x), abs(py - y)
+        if (dx < half_size and dy < half_size) if strict else (dx <= half_size and dy <= half_size):
+            found.append((dx * dx + dy * dy, i))
+    return min(found)[1] if found else None
+
+
+def test_queries_match_a_linear_scan():
+    rng = random.Random(4)
+    points = [(rng.randrange(200), rng.randrange(150)) for _ in range(300)]
+    points += points[:10]  # duplicates: ties go to the lower index
+    index = PointGrid(points, cell_size=12)
+
+    for step in range(400):
+        if step % 20 == 0:
+            i = rng.randrange(len(points))
+            points[i] = (rng.randrange(-20, 220), rng.randrange(-20, 170))
+            index.move(i, points[i])
+        if step % 50 == 0:
+            i = rng.randrange(len(points))
+            del points[i]
+            index.remove(i)
+
+        x, y = rng.uniform(-30, 230), rng.uniform(-30, 180)
+        if step % 2:
+            x, y = round(x), round(y)  # on-grid clicks, where equal distances happen
+        radius = rng.choice([0, 3, 12, 40])
+        assert index.within(x, y, radius) == sorted(
+            i for i, (px, py) in enumerate(points) if (px - x) ** 2 + (py - y) ** 2 <= radius * radius)
+        assert index.nearest(x, y) == linear_nearest(points, x, y)
+        assert index.nearest(x, y, radius) == linear_nearest(points, x, y, radius)
+        for strict in (False, True):
+            assert index.hit(x, y, 6, strict) == linear_hit(points, x, y, 6, strict)
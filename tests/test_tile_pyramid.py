@@ -0,0 +1,95 @@
+import types
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import tile_pyramid
+from tile_pyramid import BlendedPyramid, TiledView, TilePyramid
+
+
+class FakeCanvas:
+    """Just enough of a Tk canvas for TiledView without a display."""
+
+    def __init__(self):
+        self.images = []
+
+    def after_idle(self, fn):
+        return "job"
+
+    def after_cancel(self, job):
+        pass
+
+    def delete(self, tag):
+        self.images = []
+
+    def create_image(self, x, y, anchor, image, tags):
+        self.images.append((x, y, image))
+
+    def tag_lower(self, tag):
+        pass
+
+
+class FakePhoto:
+    created = 0
+
+    def __init__(self, image, master=None):
+        FakePhoto.created += 1
+        self.image = image.copy()
+
+    def paste(self, image):
+        self.image.paste(image)
+
+
+@pytest.fixture
+def fake_tk(monkeypatch):
+    monkeypatch.setattr(tile_pyramid, "ImageTk", types.SimpleNamespace(PhotoImage=FakePhoto))
+
+
+def random_image(seed, size=(600, 450)):
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8))
+
+
+def test_tiles_reassemble_every_level():
+    image = random_image(0)
+    pyramid = TilePyramid(image, tile_size=128)
+    assert [level.size for level in pyramid.levels] == [(600, 450), (300, 225), (150, 113), (75, 57)]
+    for level, expected in enumerate(pyramid.levels):
+        canvas = Image.new("RGB", expected.size)
+        for tx, ty in pyramid.tile_range(level, 0, 0, image.width, image.height):
+            canvas.paste(pyramid.tile(level, tx, ty), (tx * 128, ty * 128))
+        assert np.array_equal(np.asarray(canvas), np.asarray(expected))
+
+
+def test_zoom_keeps_the_point_under_the_cursor(fake_tk):
+    view = TiledView(FakeCanvas(), {"map": TilePyramid(random_image(1))}, (0.5, 0.5), (300, 225))
+    before = view.to_world(120, 80)
+    view.zoom_at(120, 80, 3)
+    assert view.to_world(120, 80) == pytest.approx(before)
+
+
+def test_opacity_change_reblends_visible_tiles_in_place(fake_tk):
+    blended = BlendedPyramid(TilePyramid(random_image(2), tile_size=128), TilePyramid(random_image(3), tile_size=128))
+    view = TiledView(FakeCanvas(), {"blend": blended}, (0.5, 0.5), (300, 225))
+    view.render()
+    created = FakePhoto.created
+
+    blended.alpha = 0.8
+    view.refresh_blend()
+    assert FakePhoto.created == created  # same PhotoImages, only pasted into
+    for entry in view._visible:
+        expected = Image.blend(entry.layers[0], entry.layers[1], 0.8)
+        assert np.array_equal(np.asarray(entry.photo.image), np.asarray(expected))
+
+
+def test_clear_takes_tiles_off_until_the_next_change(fake_tk):
+    canvas = FakeCanvas()
+    view = TiledView(canvas, {"map": TilePyramid(random_image(4), tile_size=128)}, (1, 1), (600, 450))
+    view.render()
+    assert canvas.images
+    view.request_render()
+    view.clear()
+    assert canvas.images == [] and view._render_job is None
+    view.zoom_at(0, 0, 2)
+    assert view._render_job is not None
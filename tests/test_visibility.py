@@ -0,0 +1,64 @@
+import types
+
+import numpy as np
+
+from map_maker import NavPointEditor
+from nav_grid import NavGrid
+from routing import path_deviation
+from visibility import LineOfSight, build_adjacency, prune_pairs, visible_pairs
+
+
+def open_sea_points(count, seed=3):
+    cells = np.zeros((120, 160), dtype=np.uint8)
+    cells[50:70, 60:100] = 1  # one island, so some pairs are blocked
+    rng = np.random.default_rng(seed)
+    water = np.flatnonzero(cells.reshape(-1) == 0)
+    ys, xs = np.divmod(rng.choice(water, size=count, replace=False), cells.shape[1])
+    return cells, list(zip(xs.tolist(), ys.tolist()))
+
+
+def test_prune_keeps_paths_within_tolerance():
+    cells, points = open_sea_points(200)
+    pairs = visible_pairs(LineOfSight(cells, cells.shape[1], cells.shape[0]), points)
+    pruned, stats = prune_pairs(points, pairs, tolerance=0.01)
+
+    # Short edges decided first must be able to prune the long ones
+    assert stats.edges_after < stats.edges_before // 4
+    full = build_adjacency(points, pairs)
+    worst, _, lost = path_deviation(full, build_adjacency(points, pruned), range(0, 200, 10))
+    assert lost == 0
+    assert worst <= 0.01 + 1e-9
+
+
+def test_looser_tolerance_prunes_more():
+    cells, points = open_sea_points(200)
+    pairs = visible_pairs(LineOfSight(cells, cells.shape[1], cells.shape[0]), points)
+    _, tight = prune_pairs(points, pairs, tolerance=0.01)
+    _, loose = prune_pairs(points, pairs, tolerance=0.05)
+    assert loose.edges_after < tight.edges_after
+
+
+def test_fast_path_matches_editor_bresenham():
+    rng = np.random.default_rng(11)
+    width, height = 90, 70
+    cells = (rng.random((height, width)) < 0.03).astype(np.uint8)  # scattered single rocks
+    cells[20:35, 30:50] = 1
+    grid = NavGrid(cells.tobytes(), width, height)
+    editor = types.SimpleNamespace(is_walkable=grid.is_walkable)
+    los = LineOfSight(cells, width, height)
+
+    x0, x1 = rng.integers(0, width, (2, 4000))
+    y0, y1 = rng.integers(0, height, (2, 4000))
+    # Plenty of axis-aligned, diagonal and zero-length segments too
+    x1[:300] = x0[:300]
+    y1[300:600] = y0[300:600]
+    x1[600:900] = np.clip(x0[600:900] + (y1[600:900] - y0[600:900]), 0, width - 1)
+    x1[900:1000], y1[900:1000] = x0[900:1000], y0[900:1000]
+
+    fast = los.clear_segments(x0, y0, x1, y1)
+    for i, segment in enumerate(zip(x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist())):
+        a, b = sorted([segment[:2], segment[2:]])  # LineOfSight walks from the smaller endpoint
+        expected = NavPointEditor.is_clear_path(editor, *a, *b)
+        assert fast[i] == expected, segment
+        assert los.is_clear(*segment) == expected
+    assert 0 < fast.sum() < len(fast)